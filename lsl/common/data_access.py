@@ -14,7 +14,7 @@ except ImportError:
     from urllib.request import urlopen
 from urllib.error import HTTPError
 
-from lsl.common.paths import DATA as DATA_PATH
+from lsl.common.paths import data_file
 from lsl.common.progress import DownloadBar
 from lsl.misc.file_cache import FileCache, MemoryCache
 from lsl.common.color import colorfy
@@ -47,7 +47,7 @@ class _DataAccess(object):
             warnings.warn(colorfy("{{%yellow Cannot create or write to on-disk data cache, using in-memory data cache}}"), RuntimeWarning)
             
     def _local_copy_mtime(self, relative_url):
-        local_path = os.path.join(DATA_PATH, relative_url)
+        local_path = data_file(relative_url)
         
         mtime = 0
         if os.path.exists(local_path):
@@ -63,7 +63,7 @@ class _DataAccess(object):
         
         metaname = filename+'_meta'
         
-        local_path = os.path.join(DATA_PATH, relative_url)
+        local_path = data_file(relative_url)
         
         received = 0
         if os.path.exists(local_path):
@@ -51,7 +51,7 @@ from lsl.common.mcs import mjdmpm_to_datetime, datetime_to_mjdmpm, status_to_str
                            flat_to_multi, apply_pointing_correction, MIB_REC_TYPE_BRANCH, \
                            MIB_REC_TYPE_VALUE, MIB_INDEX_FIELD_LENGTH, MIB_LABEL_FIELD_LENGTH, \
                            MIB_VAL_FIELD_LENGTH, MIB, MIBEntry
-
+from lsl.misc.lru_cache import lru_cache
 
 from lsl.misc import telemetry
 telemetry.track_module()
@@ -338,9 +338,25 @@ def parse_c_struct(cStruct, char_mode='str', endianness='native', overrides=None
     bytes which can be converted to strings via chr().
     """
     
-    # Process the macro overrides dictionary
+    # Process the macro overrides dictionary into something hashable
     if overrides is None:
         overrides = {}
+    overrides = tuple(sorted(overrides.items()))
+    
+    # Build, or retrieve, the structure and create a new instance
+    return _build_c_struct(cStruct, char_mode, endianness, overrides)()
+
+
+@lru_cache(maxsize=128)
+def _build_c_struct(cStruct, char_mode, endianness, overrides):
+    """
+    Backend for parse_c_struct that builds the ctypes.Structure class.  The
+    classes are cached so that repeated calls for the same C structure, e.g., 
+    when reading records from a file, do not need to re-parse the declaration.
+    """
+    
+    # Process the macro overrides
+    overrides = dict(overrides)
         
     # Figure out how to deal with character arrays
     if char_mode not in ('str', 'int'):
@@ -520,8 +536,7 @@ def parse_c_struct(cStruct, char_mode='str', endianness='native', overrides=None
                 output[f] = eval("self.%s" % f)
             return output
     
-    # Create and return
-    return MyStruct()
+    return MyStruct
 
 
 def _two_bytes_swap(value):
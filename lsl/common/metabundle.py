@@ -278,18 +278,20 @@ def get_sdm(tarname):
     If a sdm.dat file cannot be found in the tarball, None is returned.
     """
     
-    with managed_mkdtemp(prefix='metadata-bundle-') as tempDir:
-        # Extract the SDM file.  If the dynamic/sdm.dat file cannot be found, None
-        # is returned via the try...except block.
-        tf = _open_tarball(tarname)
-        try:
-            ti = tf.getmember('dynamic/sdm.dat')
-        except KeyError:
-            return None
-        tf.extractall(path=tempDir, members=[ti,])
+    # Find the SDM file.  If the dynamic/sdm.dat file cannot be found, None
+    # is returned via the try...except block.
+    tf = _open_tarball(tarname)
+    try:
+        ti = tf.getmember('dynamic/sdm.dat')
+    except KeyError:
+        return None
         
-        # Parse the SDM file and build the SDM instance
-        dynamic = sdm.parse_sdm(os.path.join(tempDir, 'dynamic', 'sdm.dat'))
+    # Parse the SDM file directly from the tarball and build the SDM instance
+    fh = tf.extractfile(ti)
+    try:
+        dynamic = sdm.parse_sdm(fh)
+    finally:
+        fh.close()
         
     return dynamic
 
@@ -9,6 +9,9 @@ MODULE
 
 DATA
     the absolute path to the data directory where data files are stored
+
+The module also provides a data_file() function that returns the absolute 
+path to a file in the DATA directory.
 """
 
 # Python2 compatibility
@@ -23,12 +26,14 @@ try:
 except ImportError:
     import imp
     
+from lsl.misc.lru_cache import lru_cache
+
 from lsl.misc import telemetry
 telemetry.track_module()
 
 
-__version__ = '0.2'
-__all__ = ['MODULE', 'DATA', 'WISDOM', 'MODULE_BUILD', 'DATA_BUILD', 'WISDOM_BUILD']
+__version__ = '0.3'
+__all__ = ['MODULE', 'DATA', 'WISDOM', 'MODULE_BUILD', 'DATA_BUILD', 'WISDOM_BUILD', 'data_file']
 
 
 try:
@@ -50,6 +55,19 @@ DATA = os.path.join(MODULE, 'data')
 WISDOM = os.path.join(os.path.expanduser('~'), '.lsl')
 
 
+@lru_cache(maxsize=None)
+def data_file(name):
+    """
+    Given the name of a file relative to the data directory, return the 
+    absolute path to that file within DATA.  The paths are cached since the
+    same data files are looked up repeatedly.
+    
+    .. versionadded:: 3.0.0
+    """
+    
+    return os.path.join(DATA, *name.split('/'))
+
+
 # If we seem to be in the building directory, make the module and 
 # data build paths point to the right place.  This is done so that 
 # the testing scripts run via:
@@ -9,12 +9,13 @@ import sys
 if sys.version_info < (3,):
     range = xrange
     
+import copy
+import numpy
 from datetime import datetime
 
-from lsl.common.mcs import summary_to_string, parse_c_struct, flat_to_multi, \
-                        STATION_SETTINGS_STRUCT, SUBSYSTEM_STATUS_STRUCT, SUBSUBSYSTEM_STATUS_STRUCT, \
+from lsl.common.mcs import summary_to_string, \
                         ME_MAX_NSTD, ME_MAX_NFEE, ME_MAX_NRPD, ME_MAX_NSEP, ME_MAX_NARB, \
-                        ME_MAX_NDP1, ME_MAX_NDP2, ME_MAX_NDR
+                        ME_MAX_NARBCH, ME_MAX_NDP1, ME_MAX_NDP1CH, ME_MAX_NDP2, ME_MAX_NDR
 
 from lsl.misc import telemetry
 telemetry.track_module()
@@ -24,6 +25,53 @@ __version__ = '0.3'
 __all__ = ['SubSystemStatus', 'SubSubSystemStatus', 'StationSettings', 'SDM', 'parse_sdm']
 
 
+# Names of the subsystems in the order they appear in the MRP/MUP settings
+_SUBSYSTEM_NAMES = ('ASP', 'DP_', 'DR1', 'DR2', 'DR3', 'DR4', 'DR5', 'SHL', 'MCS')
+
+# Names of the individual data recorder subsystems
+_DR_NAMES = tuple('dr%i' % (n+1,) for n in range(ME_MAX_NDR))
+
+
+# Little endian record types for the fixed-size C structures found in a SDM 
+# file.  These follow the 64-bit packing used by the MCS C structures, i.e., 
+# the 'long tv[2]' in subsystem_status_struct is aligned to eight bytes.
+## subsystem_status_struct
+_SUBSYSTEM_STATUS = numpy.dtype({'names':   ['summary', 'info', 'tv'],
+                                 'formats': ['<i4', 'S256', ('<i8', (2,))],
+                                 'offsets': [0, 4, 264],
+                                 'itemsize': 280})
+## subsubsystem_status_struct
+_SUBSUBSYSTEM_STATUS = numpy.dtype([('fee', '<i4', (ME_MAX_NFEE,)),
+                                    ('rpd', '<i4', (ME_MAX_NRPD,)),
+                                    ('sep', '<i4', (ME_MAX_NSEP,)),
+                                    ('arb', '<i4', (ME_MAX_NARB, ME_MAX_NARBCH)),
+                                    ('dp1', '<i4', (ME_MAX_NDP1, ME_MAX_NDP1CH)),
+                                    ('dp2', '<i4', (ME_MAX_NDP2,)),
+                                    ('dr',  '<i4', (ME_MAX_NDR,))])
+## Antenna and data path status
+_ANTENNA_STATUS = numpy.dtype([('ant_stat', '<i4', (ME_MAX_NSTD, 2)),
+                               ('dpo_stat', '<i4', (ME_MAX_NDR,))])
+## station_settings_struct
+_STATION_SETTINGS = numpy.dtype([('report',          '<i2', (len(_SUBSYSTEM_NAMES),)),
+                                 ('update',          '<i2', (len(_SUBSYSTEM_NAMES),)),
+                                 ('fee_power',       '<i2', (ME_MAX_NSTD,)),
+                                 ('asp_filter',      '<i2', (ME_MAX_NSTD,)),
+                                 ('asp_atten_1',     '<i2', (ME_MAX_NSTD,)),
+                                 ('asp_atten_2',     '<i2', (ME_MAX_NSTD,)),
+                                 ('asp_atten_split', '<i2', (ME_MAX_NSTD,)),
+                                 ('tbn_gain',        '<i2'),
+                                 ('drx_gain',        '<i2')])
+## The full SDM file
+_SDM = numpy.dtype([('station',  _SUBSYSTEM_STATUS),
+                    ('shl',      _SUBSYSTEM_STATUS),
+                    ('asp',      _SUBSYSTEM_STATUS),
+                    ('dp',       _SUBSYSTEM_STATUS),
+                    ('dr',       _SUBSYSTEM_STATUS, (ME_MAX_NDR,)),
+                    ('status',   _SUBSUBSYSTEM_STATUS),
+                    ('antenna',  _ANTENNA_STATUS),
+                    ('settings', _STATION_SETTINGS)])
+
+
 class SubSystemStatus(object):
     """
     Python object that holds the status for a particular subsystem in a SDM 
@@ -45,15 +93,44 @@ class SubSystemStatus(object):
         subsystem_status_struct C structure and update the Python instance accordingly.
         """
         
-        ## They are the same size so this really doesn't matter
-        sssStruct = parse_c_struct(SUBSYSTEM_STATUS_STRUCT, endianness='little')
+        self.unpack_from(fh.read(_SUBSYSTEM_STATUS.itemsize))
+        
+    def unpack_from(self, buffer, offset=0):
+        """
+        Given a buffer and an offset into that buffer, interpret it in the 
+        context of a subsystem_status_struct C structure and update the Python
+        instance accordingly.  Returns the offset of the first byte after the
+        structure.
+        """
+        
+        values = numpy.frombuffer(buffer, dtype=_SUBSYSTEM_STATUS, count=1, offset=offset)[0]
+        self._load_record(values)
         
-        fh.readinto(sssStruct)
+        return offset + _SUBSYSTEM_STATUS.itemsize
         
-        self.summary = sssStruct.summary
-        self.info = sssStruct.info
-        ts, tu = sssStruct.tv
+    def _load_record(self, values):
+        """
+        Update the Python instance from a decoded subsystem_status_struct 
+        record.
+        """
+        
+        ts, tu = values['tv'].tolist()
+        
+        self.summary = int(values['summary'])
+        self.info = bytes(values['info']).split(b'\x00', 1)[0]
         self.time = ts + tu/1.0e6
+        
+    @classmethod
+    def _from_record(cls, name, values):
+        """
+        Build a new instance directly from a decoded subsystem_status_struct 
+        record, skipping the type coercions done by __init__.
+        """
+        
+        obj = cls.__new__(cls)
+        obj.name = name
+        obj._load_record(values)
+        return obj
 
 
 class SubSubSystemStatus(object):
@@ -63,37 +140,37 @@ class SubSubSystemStatus(object):
     
     def __init__(self, fee=None, rpd=None, sep=None, arb=None, dp1=None, dp2=None, dr=None):
         if fee is None:
-            self.fee = [0 for n in range(ME_MAX_NFEE)]
+            self.fee = numpy.zeros(ME_MAX_NFEE, dtype=numpy.int32)
         else:
             self.fee = fee
         
         if rpd is None:
-            self.rpd = [0 for n in range(ME_MAX_NRPD)]
+            self.rpd = numpy.zeros(ME_MAX_NRPD, dtype=numpy.int32)
         else:
             self.rpd = rpd
             
         if sep is None:
-            self.sep = [0 for n in range(ME_MAX_NSEP)]
+            self.sep = numpy.zeros(ME_MAX_NSEP, dtype=numpy.int32)
         else:
             self.sep = sep
         
         if arb is None:
-            self.arb = [0 for n in range(ME_MAX_NARB)]
+            self.arb = numpy.zeros((ME_MAX_NARB, ME_MAX_NARBCH), dtype=numpy.int32)
         else:
             self.arb = arb
             
         if dp1 is None:
-            self.dp1 = [0 for n in range(ME_MAX_NDP1)]
+            self.dp1 = numpy.zeros((ME_MAX_NDP1, ME_MAX_NDP1CH), dtype=numpy.int32)
         else:
             self.dp1 = dp1
         
         if dp2 is None:
-            self.dp2 = [0 for n in range(ME_MAX_NDP2)]
+            self.dp2 = numpy.zeros(ME_MAX_NDP2, dtype=numpy.int32)
         else:
             self.dp2 = dp2
             
         if dr is None:
-            self.dr = [0 for n in range(ME_MAX_NDR)]
+            self.dr = numpy.zeros(ME_MAX_NDR, dtype=numpy.int32)
         else:
             self.dr = dr
             
@@ -103,20 +180,35 @@ class SubSubSystemStatus(object):
         subsubsystem_status_struct C structure and update the Python instance accordingly.
         """
         
-        # Figure out what to do
-        ssssStruct = parse_c_struct(SUBSUBSYSTEM_STATUS_STRUCT, endianness='little')
+        self.unpack_from(fh.read(_SUBSUBSYSTEM_STATUS.itemsize))
+        
+    def unpack_from(self, buffer, offset=0):
+        """
+        Given a buffer and an offset into that buffer, interpret it in the 
+        context of a subsubsystem_status_struct C structure and update the 
+        Python instance accordingly.  Returns the offset of the first byte 
+        after the structure.
+        """
         
         # Read
-        fh.readinto(ssssStruct)
-        
-        # Parse and save
-        self.fee = list(ssssStruct.eFEEStat)
-        self.rpd = list(ssssStruct.eRPDStat)
-        self.sep = list(ssssStruct.eSEPStat)
-        self.arb = flat_to_multi(ssssStruct.eARBStat, *ssssStruct.dims['eARBStat'])
-        self.dp1 = flat_to_multi(ssssStruct.eDP1Stat, *ssssStruct.dims['eDP1Stat'])
-        self.dp2 = list(ssssStruct.eDP2Stat)
-        self.dr  = list(ssssStruct.eDRStat)
+        values = numpy.frombuffer(buffer, dtype=_SUBSUBSYSTEM_STATUS, count=1, offset=offset)[0]
+        self._load_record(values)
+        
+        return offset + _SUBSUBSYSTEM_STATUS.itemsize
+        
+    def _load_record(self, values):
+        """
+        Update the Python instance from a decoded subsubsystem_status_struct 
+        record.
+        """
+        
+        self.fee = values['fee'].astype(numpy.int32)
+        self.rpd = values['rpd'].astype(numpy.int32)
+        self.sep = values['sep'].astype(numpy.int32)
+        self.arb = values['arb'].astype(numpy.int32)
+        self.dp1 = values['dp1'].astype(numpy.int32)
+        self.dp2 = values['dp2'].astype(numpy.int32)
+        self.dr  = values['dr'].astype(numpy.int32)
 
 
 class StationSettings(object):
@@ -127,37 +219,37 @@ class StationSettings(object):
     def __init__(self, report=None, update=None, fee_power=None, asp_filter=None, asp_atten_1=None, asp_atten_2=None, asp_atten_split=None, 
                 tbn_gain=-1, drx_gain=-1):
         if report is None:
-            self.report = {'ASP': -1, 'DP_': -1, 'DR1': -1, 'DR2': -1, 'DR3': -1, 'DR4': -1, 'DR5': -1, 'SHL': -1, 'MCS': -1}
+            self.report = dict.fromkeys(_SUBSYSTEM_NAMES, -1)
         else:
             self.report = report
             
         if update is None:
-            self.update = {'ASP': -1, 'DP_': -1, 'DR1': -1, 'DR2': -1, 'DR3': -1, 'DR4': -1, 'DR5': -1, 'SHL': -1, 'MCS': -1}
+            self.update = dict.fromkeys(_SUBSYSTEM_NAMES, -1)
         else:
             self.update = update
             
         if fee_power is None:
-            self.fee_power = [0 for n in range(ME_MAX_NSTD)]
+            self.fee_power = numpy.zeros(ME_MAX_NSTD, dtype=numpy.int16)
         else:
             self.fee_power = fee_power
             
         if asp_filter is None:
-            self.asp_filter = [0 for n in range(ME_MAX_NSTD)]
+            self.asp_filter = numpy.zeros(ME_MAX_NSTD, dtype=numpy.int16)
         else:
             self.asp_filter = asp_filter
             
         if asp_atten_1 is None:
-            self.asp_atten_1 = [0 for n in range(ME_MAX_NSTD)]
+            self.asp_atten_1 = numpy.zeros(ME_MAX_NSTD, dtype=numpy.int16)
         else:
             self.asp_atten_1 = asp_atten_1
             
         if asp_atten_2 is None:
-            self.asp_atten_2 = [0 for n in range(ME_MAX_NSTD)]
+            self.asp_atten_2 = numpy.zeros(ME_MAX_NSTD, dtype=numpy.int16)
         else:
             self.asp_atten_2 = asp_atten_2
             
         if asp_atten_split is None:
-            self.asp_atten_split = [0 for n in range(ME_MAX_NSTD)]
+            self.asp_atten_split = numpy.zeros(ME_MAX_NSTD, dtype=numpy.int16)
         else:
             self.asp_atten_split = asp_atten_split
             
@@ -170,43 +262,41 @@ class StationSettings(object):
         station_settings_struct C structure and update the Python instance accordingly.
         """
         
-        # Figure out what to do
-        ssStruct = parse_c_struct(STATION_SETTINGS_STRUCT, endianness='little')
+        self.unpack_from(fh.read(_STATION_SETTINGS.itemsize))
+        
+    def unpack_from(self, buffer, offset=0):
+        """
+        Given a buffer and an offset into that buffer, interpret it in the 
+        context of a station_settings_struct C structure and update the Python
+        instance accordingly.  Returns the offset of the first byte after the
+        structure.
+        """
         
         # Read
-        fh.readinto(ssStruct)
+        values = numpy.frombuffer(buffer, dtype=_STATION_SETTINGS, count=1, offset=offset)[0]
+        self._load_record(values)
+        
+        return offset + _STATION_SETTINGS.itemsize
+        
+    def _load_record(self, values):
+        """
+        Update the Python instance from a decoded station_settings_struct 
+        record.
+        """
         
-        # Parse and save
         ## Common
-        self.report['ASP'] = ssStruct.mrp_asp
-        self.report['DP_'] = ssStruct.mrp_dp
-        self.report['DR1'] = ssStruct.mrp_dr1
-        self.report['DR2'] = ssStruct.mrp_dr2
-        self.report['DR3'] = ssStruct.mrp_dr3
-        self.report['DR4'] = ssStruct.mrp_dr4
-        self.report['DR5'] = ssStruct.mrp_dr5
-        self.report['SHL'] = ssStruct.mrp_shl
-        self.report['MCS'] = ssStruct.mrp_mcs
-        
-        self.update['ASP'] = ssStruct.mup_asp
-        self.update['DP_'] = ssStruct.mup_dp
-        self.update['DR1'] = ssStruct.mup_dr1
-        self.update['DR2'] = ssStruct.mup_dr2
-        self.update['DR3'] = ssStruct.mup_dr3
-        self.update['DR4'] = ssStruct.mup_dr4
-        self.update['DR5'] = ssStruct.mup_dr5
-        self.update['SHL'] = ssStruct.mup_shl
-        self.update['MCS'] = ssStruct.mup_mcs
-        
-        self.fee_power = flat_to_multi(ssStruct.fee, *ssStruct.dims['fee'])
-        
-        self.asp_filter = list(ssStruct.asp_flt)
-        self.asp_atten_1 = list(ssStruct.asp_at1)
-        self.asp_atten_2 = list(ssStruct.asp_at2)
-        self.asp_atten_split = list(ssStruct.asp_ats)
-        
-        self.tbn_gain = ssStruct.tbn_gain
-        self.drx_gain = ssStruct.drx_gain
+        self.report = dict(zip(_SUBSYSTEM_NAMES, values['report'].tolist()))
+        self.update = dict(zip(_SUBSYSTEM_NAMES, values['update'].tolist()))
+        
+        self.fee_power = values['fee_power'].astype(numpy.int16)
+        
+        self.asp_filter = values['asp_filter'].astype(numpy.int16)
+        self.asp_atten_1 = values['asp_atten_1'].astype(numpy.int16)
+        self.asp_atten_2 = values['asp_atten_2'].astype(numpy.int16)
+        self.asp_atten_split = values['asp_atten_split'].astype(numpy.int16)
+        
+        self.tbn_gain = int(values['tbn_gain'])
+        self.drx_gain = int(values['drx_gain'])
 
 
 class SDM(object):
@@ -233,7 +323,7 @@ class SDM(object):
         else:
             self.dp = dp
         if dr is None:
-            self.dr  = [SubSystemStatus('dr%i' % (n+1,)) for n in range(ME_MAX_NDR)]
+            self.dr  = [SubSystemStatus(name) for name in _DR_NAMES]
         else:
             self.dr = dr
         
@@ -243,11 +333,11 @@ class SDM(object):
             self.status = status
         
         if ant_status is None:
-            self.ant_status = [[0,0] for n in range(ME_MAX_NSTD)]
+            self.ant_status = numpy.zeros((ME_MAX_NSTD, 2), dtype=numpy.int32)
         else:
             self.ant_status = ant_status
         if dpo_status is None:
-            self.dpo_status = [0 for n in range(ME_MAX_NDR)]
+            self.dpo_status = numpy.zeros(ME_MAX_NDR, dtype=numpy.int32)
         else:
             self.dpo_status = dpo_status
             
@@ -262,12 +352,17 @@ class SDM(object):
         of Antenna instances with updated antenna status codes.
         """
         
-        updatedAntennas = []
-        for ant in antennas:
-            updatedAntennas.append(ant)
-            
-            index = self.ant_status.index(ant.id)
-            updatedAntennas[-1].status = self.ant_status[index]
+        # The antenna status is stored by stand and polarization, i.e., as
+        # sc.Stand[i].Ant[k].iSS, so gather all of the status codes at once
+        ant_status = numpy.asarray(self.ant_status)
+        stands = numpy.array([ant.stand.id-1 for ant in antennas], dtype=numpy.intp)
+        pols = numpy.array([ant.pol for ant in antennas], dtype=numpy.intp)
+        status = ant_status[stands, pols].tolist()
+        
+        updatedAntennas = [None]*len(antennas)
+        for i,(ant,stat) in enumerate(zip(antennas, status)):
+            updatedAntennas[i] = copy.copy(ant)
+            updatedAntennas[i].status = stat
             
         return updatedAntennas
 
@@ -276,36 +371,51 @@ def parse_sdm(filename):
     """
     Given a filename, read the file's contents into the SDM instance and return
     that instance.
+    
+    .. versionchanged:: 3.0.0
+        'filename' can now also be an open file handle, e.g., one returned by
+        tarfile.TarFile.extractfile().
+    
+    .. note::
+        Files that are shorter than a full SDM are padded with zeros so that
+        the missing trailing sections are zero, as they were when the file
+        was read structure-by-structure.  Files that are too short to hold
+        the sub-system status sections raise a ValueError.
     """
     
-    # Open the file
-    with open(filename, 'rb') as fh:
-        # Create a new SDM instance
-        dynamic = SDM()
-        
-        # Sub-system status sections
-        dynamic.station.binary_read(fh)
-        dynamic.shl.binary_read(fh)
-        dynamic.asp.binary_read(fh)
-        dynamic.dp.binary_read(fh)
-        for n in range(ME_MAX_NDR):
-            dynamic.dr[n].binary_read(fh)
-            
-        # Sub-sub-system status section
-        dynamic.status.binary_read(fh)
-        
-        # Antenna status and data path status
-        adpsStruct = parse_c_struct("""
-        int ant_stat[ME_MAX_NSTD][2]; /* corresponds to sc.Stand[i].Ant[k].iSS, but dynamically updated */
-        int dpo_stat[ME_MAX_NDR];     /* corresponds to sc.DPO[i].iStat, but dynamically updated */
-        """, endianness='little')
-        
-        fh.readinto(adpsStruct)
-        
-        dynamic.ant_status = flat_to_multi(adpsStruct.ant_stat, *adpsStruct.dims['ant_stat'])
-        dynamic.dpo_status = flat_to_multi(adpsStruct.dpo_stat, *adpsStruct.dims['dpo_stat'])
-        
-        # Station settings section
-        dynamic.settings.binary_read(fh)
-        
+    # Read in the entire file
+    try:
+        buffer = filename.read()
+    except AttributeError:
+        with open(filename, 'rb') as fh:
+            buffer = fh.read()
+    
+    # Make sure that there is enough to work with
+    if len(buffer) < _SDM.itemsize:
+        if len(buffer) < _SDM.fields['status'][1]:
+            raise ValueError("SDM file '%s' is too short: expected %i bytes but found %i" % (getattr(filename, 'name', filename), _SDM.itemsize, len(buffer)))
+    
+        ## Older/smaller SDM files are zero padded to the full size
+        buffer = buffer + b'\x00'*(_SDM.itemsize - len(buffer))
+    
+    # Decode the entire file in one pass
+    values = numpy.frombuffer(buffer, dtype=_SDM, count=1)[0]
+    
+    # Create a new SDM instance from the sub-system status sections
+    dynamic = SDM(station=SubSystemStatus._from_record('station', values['station']), 
+                  shl=SubSystemStatus._from_record('shl', values['shl']), 
+                  asp=SubSystemStatus._from_record('asp', values['asp']), 
+                  dp=SubSystemStatus._from_record('dp', values['dp']), 
+                  dr=[SubSystemStatus._from_record(name, value) for name,value in zip(_DR_NAMES, values['dr'])])
+    
+    # Sub-sub-system status section
+    dynamic.status._load_record(values['status'])
+    
+    # Antenna status and data path status
+    dynamic.ant_status = values['antenna']['ant_stat'].astype(numpy.int32)
+    dynamic.dpo_status = values['antenna']['dpo_stat'].astype(numpy.int32)
+    
+    # Station settings section
+    dynamic.settings._load_record(values['settings'])
+    
     return dynamic
@@ -9,6 +9,8 @@ import sys
 if sys.version_info < (3,):
     range = xrange
     
+import copy
+import numpy
 from datetime import datetime
 
 from lsl.common.mcsADP import summary_to_string, parse_c_struct, flat_to_multi, \
@@ -262,12 +264,17 @@ class SDM(object):
         of Antenna instances with updated antenna status codes.
         """
         
-        updatedAntennas = []
-        for ant in antennas:
-            updatedAntennas.append(ant)
-            
-            index = self.ant_status.index(ant.id)
-            updatedAntennas[-1].status = self.ant_status[index]
+        # The antenna status is stored by stand and polarization, i.e., as
+        # sc.Stand[i].Ant[k].iSS, so gather all of the status codes at once
+        ant_status = numpy.asarray(self.ant_status)
+        stands = numpy.array([ant.stand.id-1 for ant in antennas], dtype=numpy.intp)
+        pols = numpy.array([ant.pol for ant in antennas], dtype=numpy.intp)
+        status = ant_status[stands, pols].tolist()
+        
+        updatedAntennas = [None]*len(antennas)
+        for i,(ant,stat) in enumerate(zip(antennas, status)):
+            updatedAntennas[i] = copy.copy(ant)
+            updatedAntennas[i].status = stat
             
         return updatedAntennas
 
@@ -293,7 +293,7 @@ void compute_fengine_complex(long nStand,
                                       *(data + 2*secStart - 2*nChan*(nTap-1) + 2*k + 1));
                 }
                 
-                if( Clip && abs(in[k]) >= Clip ) {
+                if( Clip && abs2(in[k]) >= (float) Clip*Clip ) {
                     cleanFactor = 0.0;
                 }
                 
@@ -775,9 +775,10 @@ void compute_xengine_two(long nStand,
     
     // Time-domain blanking control
     long nActVis;
+    float normVis;
     
     #ifdef _OPENMP
-        #pragma omp parallel default(shared) private(c, f, nActVis, tempVis)
+        #pragma omp parallel default(shared) private(c, f, nActVis, normVis, tempVis)
     #endif
     {
         #ifdef _OPENMP
@@ -788,10 +789,11 @@ void compute_xengine_two(long nStand,
             for(f=0; f<nFFT; f++) {
                 nActVis += (long) (*(valid1 + mapper[bl][0]*nFFT + f) & *(valid2 + mapper[bl][1]*nFFT + f));
             }
+            normVis = 1.0 / (float) nActVis;
             
             for(c=0; c<nChan; c++) {
                 blas_dotc_sub(nFFT, (data2 + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, (data1 + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, &tempVis);
-                *(dataA + bl*nChan + c) = tempVis / (float) nActVis;
+                *(dataA + bl*nChan + c) = tempVis * normVis;
             }
         }
     }
@@ -830,9 +832,10 @@ void compute_xengine_three(long nStand,
     
     // Time-domain blanking control
     long nActVisPureX, nActVisPureY, nActVisCross0, nActVisCross1;
+    float normVisPureX, normVisPureY, normVisCross0, normVisCross1;
     
     #ifdef _OPENMP
-        #pragma omp parallel default(shared) private(c, f, nActVisPureX, nActVisPureY, nActVisCross0, nActVisCross1, tempVis)
+        #pragma omp parallel default(shared) private(c, f, nActVisPureX, nActVisPureY, nActVisCross0, nActVisCross1, normVisPureX, normVisPureY, normVisCross0, normVisCross1, tempVis)
     #endif
     {
         #ifdef _OPENMP
@@ -849,23 +852,27 @@ void compute_xengine_three(long nStand,
                 nActVisCross0 += (long) (*(validX + mapper[bl][0]*nFFT + f) & *(validY + mapper[bl][1]*nFFT + f));
                 nActVisCross1 += (long) (*(validY + mapper[bl][0]*nFFT + f) & *(validX + mapper[bl][1]*nFFT + f));
             }
+            normVisPureX  = 1.0 / (float) nActVisPureX;
+            normVisPureY  = 1.0 / (float) nActVisPureY;
+            normVisCross0 = 1.0 / (float) nActVisCross0;
+            normVisCross1 = 1.0 / (float) nActVisCross1;
             
             for(c=0; c<nChan; c++) {
                 // XX
                 blas_dotc_sub(nFFT, (dataX + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, (dataX + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, &tempVis);
-                *(dataA + 0*nBL*nChan + bl*nChan + c) = tempVis / (float) nActVisPureX;
+                *(dataA + 0*nBL*nChan + bl*nChan + c) = tempVis * normVisPureX;
                 
                 // XY
                 blas_dotc_sub(nFFT, (dataY + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, (dataX + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, &tempVis);
-                *(dataA + 1*nBL*nChan + bl*nChan + c) = tempVis / (float) nActVisCross0;
+                *(dataA + 1*nBL*nChan + bl*nChan + c) = tempVis * normVisCross0;
                 
                 // YX
                 blas_dotc_sub(nFFT, (dataX + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, (dataY + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, &tempVis);
-                *(dataA + 2*nBL*nChan + bl*nChan + c) = tempVis / (float) nActVisCross1;
+                *(dataA + 2*nBL*nChan + bl*nChan + c) = tempVis * normVisCross1;
                 
                 // YY
                 blas_dotc_sub(nFFT, (dataY + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, (dataY + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, &tempVis);
-                *(dataA + 3*nBL*nChan + bl*nChan + c) = tempVis / (float) nActVisPureY;
+                *(dataA + 3*nBL*nChan + bl*nChan + c) = tempVis * normVisPureY;
             }
         }
     }
@@ -11,24 +11,35 @@ if sys.version_info < (3,):
     range = xrange
     
 import numpy
-
+try:
+    import scipy.fft as _fft
+    _FFT_KWDS = {'workers': -1}
+except ImportError:
+    _fft = numpy.fft
+    _FFT_KWDS = {}
+    
 from lsl.correlator.fx import null_window
+from lsl.misc.lru_cache import lru_cache
 
 from lsl.misc import telemetry
 telemetry.track_module()
 
 
-__version__ = '0.3'
+__version__ = '0.4'
 __all__ = ['fft', 'fft2', 'fft4', 'fft8', 'fft16', 'fft32']
 
+@lru_cache(maxsize=32)
 def __filterCoeff(N, P):
     """
     Private function to generate the filter bank coefficients for N 
-    channels using P taps.
+    channels using P taps.  The coefficients are cached and returned as a 
+    read-only array.
     """
 
     t = numpy.arange(N*P)
-    return numpy.sinc((t - N*P/2.0 + 0.5)/N)
+    coeff = numpy.sinc((t - N*P/2.0 + 0.5)/N)
+    coeff.flags.writeable = False
+    return coeff
 
 
 def fft(signal, N, P=1, window=null_window):
@@ -37,17 +48,36 @@ def fft(signal, N, P=1, window=null_window):
     taps.  Optionally, a window function can be specified using the 
     'window' keyword.  See :mod:`lsl.correlator.fx.calcSpectra` for 
     details on using window functions.
-    """
     
-    filteredSignal = signal[0:N*P]*window(N*P)*__filterCoeff(N, P)
+    .. versionchanged:: 3.0.0
+        Single precision signals now return single precision spectra when 
+        scipy.fft is available.
+    """
     
-    for i in range(0, P):
-        fbTemp = numpy.fft.fft(filteredSignal[i*N:(i+1)*N])
-        try:
-            fbOutput += fbTemp
-        except NameError:
-            fbOutput = fbTemp*1.0
-            
+    # Build the taper so that single precision signals stay single precision.
+    # There is no need to apply the default window since it is all ones.
+    taper = __filterCoeff(N, P)
+    if window is not null_window:
+        taper = window(N*P)*taper
+    if signal.dtype in (numpy.float32, numpy.complex64):
+        taper = taper.astype(numpy.float32)
+        
+    # Since the FFT is linear, summing the transforms of the taps is the same
+    # as transforming the sum of the taps.  Apply the taper and sum over the 
+    # taps in a single reduction.  Real-valued signals only need the 
+    # non-negative frequencies.
+    filteredSignal = numpy.einsum('ij,ij->j', signal[0:N*P].reshape(P, N), taper.reshape(P, N))
+    isReal = (filteredSignal.dtype.kind != 'c')
+    if isReal:
+        fbOutput = _fft.rfft(filteredSignal, **_FFT_KWDS)
+    else:
+        fbOutput = _fft.fft(filteredSignal, **_FFT_KWDS)
+        
+    # Fill in the negative frequencies for real-valued signals using the 
+    # conjugate symmetry of the transform
+    if isReal:
+        fbOutput = numpy.concatenate([fbOutput, fbOutput[1:(N+1)//2][::-1].conj()])
+        
     return fbOutput
 
 def fft2(signal, N, window=null_window):
@@ -69,6 +69,35 @@ def pol_to_pols(pol):
     return out
 
 
+def _get_freqs(LFFT, lFactor, sample_rate, central_freq=0.0, fftshift=False):
+    """
+    Private function to compute the frequencies of the first 'LFFT' channels 
+    of a 'lFactor'*'LFFT' point FFT.  If 'fftshift' is True the channels are
+    FFT-shifted and offset by 'central_freq', as is needed for complex 
+    (I/Q) data.  This gives the same values as numpy.fft.fftfreq and 
+    numpy.fft.fftshift but only builds the channels that are kept.
+    """
+    
+    val = 1.0 / (lFactor*LFFT*(1.0/sample_rate))
+    if fftshift:
+        freq = (numpy.arange(LFFT) - lFactor*LFFT//2)*val + central_freq
+    else:
+        freq = numpy.arange(LFFT)*val
+    return freq
+
+
+def _select_signals(signals, index):
+    """
+    Private function to select the signals given by the list of indicies 
+    'index'.  If the indicies are a contiguous block a view into 'signals' is
+    returned rather than a copy.
+    """
+    
+    if len(index) > 0 and list(index) == list(range(index[0], index[0]+len(index))):
+        return signals[index[0]:index[0]+len(index),...]
+    return signals[index,...]
+
+
 def null_window(L):
     """
     Default "empty" windowing function for use with the various routines.  This
@@ -112,12 +141,7 @@ def SpecMaster(signals, LFFT=64, window=null_window, pfb=False, verbose=False, s
     # frequency space.
     if sample_rate is None:
         sample_rate = dp_common.fS
-    freq = numpy.fft.fftfreq(lFactor*LFFT, d=1.0/sample_rate)
-    # Deal with TBW and TBN data in the correct way
-    if doFFTShift:
-        freq += central_freq
-        freq = numpy.fft.fftshift(freq)
-    freq = freq[:LFFT]
+    freq = _get_freqs(LFFT, lFactor, sample_rate, central_freq=central_freq, fftshift=doFFTShift)
     
     if window is null_window:
         window = None
@@ -171,12 +195,7 @@ def StokesMaster(signals, antennas, LFFT=64, window=null_window, pfb=False, verb
     # frequency space.
     if sample_rate is None:
         sample_rate = dp_common.fS
-    freq = numpy.fft.fftfreq(lFactor*LFFT, d=1.0/sample_rate)
-    # Deal with TBW and TBN data in the correct way
-    if doFFTShift:
-        freq += central_freq
-        freq = numpy.fft.fftshift(freq)
-    freq = freq[:LFFT]
+    freq = _get_freqs(LFFT, lFactor, sample_rate, central_freq=central_freq, fftshift=doFFTShift)
     
     if window is null_window:
         window = None
@@ -187,7 +206,7 @@ def StokesMaster(signals, antennas, LFFT=64, window=null_window, pfb=False, verb
         func = _stokes.PFBPSD
     else:
         func = _stokes.FPSD
-    output = func(signals[signalsIndex1], signals[signalsIndex2], LFFT=LFFT, overlap=1, clip_level=clip_level, window=window)
+    output = func(_select_signals(signals, signalsIndex1), _select_signals(signals, signalsIndex2), LFFT=LFFT, overlap=1, clip_level=clip_level, window=window)
     
     return (freq, output)
 
@@ -233,7 +252,15 @@ def FXMaster(signals, antennas, LFFT=64, overlap=1, include_auto=False, verbose=
     signalsIndex2 = [i for (i, a) in enumerate(antennas) if a.pol == pol2]
     
     nStands = len(antennas1)
-    baselines = uvutils.get_baselines(antennas1, antennas2=antennas2, include_auto=include_auto, indicies=True)
+    
+    # Build the full list of baselines (including auto-correlations) once and
+    # prune it if the auto-correlations are not needed
+    baselinesFull = numpy.array(uvutils.get_baselines(antennas1, antennas2=antennas2, include_auto=True, indicies=True), dtype=numpy.intp).reshape(-1, 2)
+    if include_auto:
+        baselines = baselinesFull
+    else:
+        nonAuto = numpy.where( baselinesFull[:,0] != baselinesFull[:,1] )[0]
+        baselines = baselinesFull[nonAuto,:]
     
     # Figure out if we are working with complex (I/Q) data or only real.  This
     # will determine how the FFTs are done since the real data mirrors the pos-
@@ -251,11 +278,7 @@ def FXMaster(signals, antennas, LFFT=64, overlap=1, include_auto=False, verbose=
         
     if sample_rate is None:
         sample_rate = dp_common.fS
-    freq = numpy.fft.fftfreq(lFactor*LFFT, d=1.0/sample_rate)
-    if doFFTShift:
-        freq += central_freq
-        freq = numpy.fft.fftshift(freq)
-    freq = freq[:LFFT]
+    freq = _get_freqs(LFFT, lFactor, sample_rate, central_freq=central_freq, fftshift=doFFTShift)
     
     # Get the location of the phase center in radians and create a 
     # pointing vector
@@ -281,21 +304,30 @@ def FXMaster(signals, antennas, LFFT=64, overlap=1, include_auto=False, verbose=
     # the delays that we need to apply to align the signals
     dlyRef = len(freq)//2
     delays1 = numpy.zeros((nStands,LFFT))
-    delays2 = numpy.zeros((nStands,LFFT))
-    for i in list(range(nStands)):
-        xyz1 = numpy.array([antennas1[i].stand.x, antennas1[i].stand.y, antennas1[i].stand.z])
-        xyz2 = numpy.array([antennas2[i].stand.x, antennas2[i].stand.y, antennas2[i].stand.z])
+    for i in range(nStands):
+        delays1[i,:] = antennas1[i].cable.delay(freq)
         
-        delays1[i,:] = antennas1[i].cable.delay(freq) - numpy.dot(source, xyz1) / speedOfLight
-        delays2[i,:] = antennas2[i].cable.delay(freq) - numpy.dot(source, xyz2) / speedOfLight
+    ## Geometric delays for all stands at once
+    xyz1 = numpy.array([(a.stand.x, a.stand.y, a.stand.z) for a in antennas1[:nStands]]).reshape(-1, 3)
+    delays1 -= (numpy.dot(xyz1, source) / speedOfLight)[:,numpy.newaxis]
+    
+    ## The second set of delays is the same as the first if the polarizations match
+    if pol2 == pol1:
+        delays2 = delays1.copy()
+    else:
+        delays2 = numpy.zeros((nStands,LFFT))
+        for i in range(nStands):
+            delays2[i,:] = antennas2[i].cable.delay(freq)
+            
+        xyz2 = numpy.array([(a.stand.x, a.stand.y, a.stand.z) for a in antennas2[:nStands]]).reshape(-1, 3)
+        delays2 -= (numpy.dot(xyz2, source) / speedOfLight)[:,numpy.newaxis]
     if not numpy.isfinite(delays1.max()):
-        delays1[numpy.where( ~numpy.isfinite(delays1) )] = delays1[numpy.where( numpy.isfinite(delays1) )].max()
+        valid = numpy.isfinite(delays1)
+        delays1[~valid] = delays1[valid].max()
     if not numpy.isfinite(delays2.max()):
-        delays2[numpy.where( ~numpy.isfinite(delays2) )] = delays2[numpy.where( numpy.isfinite(delays2) )].max()
-    if delays1[:,dlyRef].min() < delays2[:,dlyRef].min():
-        minDelay = delays1[:,dlyRef].min()
-    else:
-        minDelay = delays2[:,dlyRef].min()
+        valid = numpy.isfinite(delays2)
+        delays2[~valid] = delays2[valid].max()
+    minDelay = min(delays1[:,dlyRef].min(), delays2[:,dlyRef].min())
     delays1 -= minDelay
     delays2 -= minDelay
     
@@ -309,41 +341,38 @@ def FXMaster(signals, antennas, LFFT=64, overlap=1, include_auto=False, verbose=
         func = _core.PFBEngine
     else:
         func = _core.FEngine
-    if signals.shape[0] != len(signalsIndex1):
-        signalsF1, validF1 = func(signals[signalsIndex1,:], freq, delays1, LFFT=LFFT, overlap=overlap, sample_rate=sample_rate, clip_level=clip_level, window=window)
-    else:
-        signalsF1, validF1 = func(signals, freq, delays1, LFFT=LFFT, overlap=overlap, sample_rate=sample_rate, clip_level=clip_level, window=window)
-        
     if pol2 == pol1:
+        signalsF1, validF1 = func(_select_signals(signals, signalsIndex1), freq, delays1, LFFT=LFFT, overlap=overlap, sample_rate=sample_rate, clip_level=clip_level, window=window)
         signalsF2 = signalsF1
         validF2 = validF1
     else:
-        signalsF2, validF2 = func(signals[signalsIndex2,:], freq, delays2, LFFT=LFFT, overlap=overlap, sample_rate=sample_rate, clip_level=clip_level, window=window)
+        ## Channelize both polarizations in a single pass
+        signalsF, validF = func(_select_signals(signals, signalsIndex1+signalsIndex2), freq, numpy.concatenate([delays1, delays2]), LFFT=LFFT, overlap=overlap, sample_rate=sample_rate, clip_level=clip_level, window=window)
+        signalsF1, signalsF2 = signalsF[:nStands], signalsF[nStands:]
+        validF1, validF2 = validF[:nStands], validF[nStands:]
         
     # X
     output = _core.XEngine2(signalsF1, signalsF2, validF1, validF2)
     if not include_auto:
         # Remove auto-correlations from the output of the X engine if we don't 
-        # need them.  To do this we need to first build the full list of baselines
-        # (including auto-correlations) and then prune that.
-        baselinesFull = uvutils.get_baselines(antennas1, antennas2=antennas2, include_auto=True, indicies=True)
-        fom = numpy.array([a1-a2 for (a1,a2) in baselinesFull])
-        nonAuto = numpy.where( fom != 0 )[0]
+        # need them
         output = output[nonAuto,:]
         
     # Apply cable gain corrections (if needed)
     if gain_correct:
-        for bl in range(output.shape[0]):
-            cableGain1 = antennas1[baselines[bl][0]].cable.gain(freq)
-            cableGain2 = antennas2[baselines[bl][1]].cable.gain(freq)
+        ## Compute the cable gains once per antenna rather than once per baseline
+        cableGains1 = numpy.array([a.cable.gain(freq) for a in antennas1])
+        if pol2 == pol1:
+            cableGains2 = cableGains1
+        else:
+            cableGains2 = numpy.array([a.cable.gain(freq) for a in antennas2])
             
-            output[bl,:] /= numpy.sqrt(cableGain1*cableGain2)
+        ## Apply them to all baselines at once
+        output /= numpy.sqrt(cableGains1[baselines[:,0],:]*cableGains2[baselines[:,1],:])
             
     # Create antenna baseline list (if needed)
     if return_baselines:
-        antennaBaselines = []
-        for bl in range(output.shape[0]):
-            antennaBaselines.append( (antennas1[baselines[bl][0]], antennas2[baselines[bl][1]]) )
+        antennaBaselines = [(antennas1[i], antennas2[j]) for i,j in baselines.tolist()]
         returnValues = (antennaBaselines, freq, output)
     else:
         returnValues = (freq, output)
@@ -387,7 +416,15 @@ def FXStokes(signals, antennas, LFFT=64, overlap=1, include_auto=False, verbose=
     signalsIndex2 = [i for (i, a) in enumerate(antennas) if a.pol == pol2]
     
     nStands = len(antennas1)
-    baselines = uvutils.get_baselines(antennas1, antennas2=antennas2, include_auto=include_auto, indicies=True)
+    
+    # Build the full list of baselines (including auto-correlations) once and
+    # prune it if the auto-correlations are not needed
+    baselinesFull = numpy.array(uvutils.get_baselines(antennas1, antennas2=antennas2, include_auto=True, indicies=True), dtype=numpy.intp).reshape(-1, 2)
+    if include_auto:
+        baselines = baselinesFull
+    else:
+        nonAuto = numpy.where( baselinesFull[:,0] != baselinesFull[:,1] )[0]
+        baselines = baselinesFull[nonAuto,:]
     
     # Figure out if we are working with complex (I/Q) data or only real.  This
     # will determine how the FFTs are done since the real data mirrors the pos-
@@ -405,11 +442,7 @@ def FXStokes(signals, antennas, LFFT=64, overlap=1, include_auto=False, verbose=
 
     if sample_rate is None:
         sample_rate = dp_common.fS
-    freq = numpy.fft.fftfreq(lFactor*LFFT, d=1.0/sample_rate)
-    if doFFTShift:
-        freq += central_freq
-        freq = numpy.fft.fftshift(freq)
-    freq = freq[:LFFT]
+    freq = _get_freqs(LFFT, lFactor, sample_rate, central_freq=central_freq, fftshift=doFFTShift)
     
     # Get the location of the phase center in radians and create a 
     # pointing vector
@@ -435,20 +468,22 @@ def FXStokes(signals, antennas, LFFT=64, overlap=1, include_auto=False, verbose=
     dlyRef = len(freq)//2
     delays1 = numpy.zeros((nStands,LFFT))
     delays2 = numpy.zeros((nStands,LFFT))
-    for i in list(range(nStands)):
-        xyz1 = numpy.array([antennas1[i].stand.x, antennas1[i].stand.y, antennas1[i].stand.z])
-        xyz2 = numpy.array([antennas2[i].stand.x, antennas2[i].stand.y, antennas2[i].stand.z])
+    for i in range(nStands):
+        delays1[i,:] = antennas1[i].cable.delay(freq)
+        delays2[i,:] = antennas2[i].cable.delay(freq)
         
-        delays1[i,:] = antennas1[i].cable.delay(freq) - numpy.dot(source, xyz1) / speedOfLight
-        delays2[i,:] = antennas2[i].cable.delay(freq) - numpy.dot(source, xyz2) / speedOfLight
+    ## Geometric delays for all stands at once
+    xyz1 = numpy.array([(a.stand.x, a.stand.y, a.stand.z) for a in antennas1[:nStands]]).reshape(-1, 3)
+    xyz2 = numpy.array([(a.stand.x, a.stand.y, a.stand.z) for a in antennas2[:nStands]]).reshape(-1, 3)
+    delays1 -= (numpy.dot(xyz1, source) / speedOfLight)[:,numpy.newaxis]
+    delays2 -= (numpy.dot(xyz2, source) / speedOfLight)[:,numpy.newaxis]
     if not numpy.isfinite(delays1.max()):
-        delays1[numpy.where( ~numpy.isfinite(delays1) )] = delays1[numpy.where( numpy.isfinite(delays1) )].max()
+        valid = numpy.isfinite(delays1)
+        delays1[~valid] = delays1[valid].max()
     if not numpy.isfinite(delays2.max()):
-        delays2[numpy.where( ~numpy.isfinite(delays2) )] = delays2[numpy.where( numpy.isfinite(delays2) )].max()
-    if delays1[:,dlyRef].min() < delays2[:,dlyRef].min():
-        minDelay = delays1[:,dlyRef].min()
-    else:
-        minDelay = delays2[:,dlyRef].min()
+        valid = numpy.isfinite(delays2)
+        delays2[~valid] = delays2[valid].max()
+    minDelay = min(delays1[:,dlyRef].min(), delays2[:,dlyRef].min())
     delays1 -= minDelay
     delays2 -= minDelay
     
@@ -462,34 +497,30 @@ def FXStokes(signals, antennas, LFFT=64, overlap=1, include_auto=False, verbose=
         func = _core.PFBEngine
     else:
         func = _core.FEngine
-    signalsF1, validF1 = func(signals[signalsIndex1,:], freq, delays1, LFFT=LFFT, overlap=overlap, sample_rate=sample_rate, clip_level=clip_level, window=window)
-    
-    signalsF2, validF2 = func(signals[signalsIndex2,:], freq, delays2, LFFT=LFFT, overlap=overlap, sample_rate=sample_rate, clip_level=clip_level, window=window)
+    ## Channelize both polarizations in a single pass
+    signalsF, validF = func(_select_signals(signals, signalsIndex1+signalsIndex2), freq, numpy.concatenate([delays1, delays2]), LFFT=LFFT, overlap=overlap, sample_rate=sample_rate, clip_level=clip_level, window=window)
+    signalsF1, signalsF2 = signalsF[:nStands], signalsF[nStands:]
+    validF1, validF2 = validF[:nStands], validF[nStands:]
     
     # X
     output = _stokes.XEngine3(signalsF1, signalsF2, validF1, validF2)
     if not include_auto:
         # Remove auto-correlations from the output of the X engine if we don't 
-        # need them.  To do this we need to first build the full list of baselines
-        # (including auto-correlations) and then prune that.
-        baselinesFull = uvutils.get_baselines(antennas1, antennas2=antennas2, include_auto=True, indicies=True)
-        fom = numpy.array([a1-a2 for (a1,a2) in baselinesFull])
-        nonAuto = numpy.where( fom != 0 )[0]
+        # need them
         output = output[:,nonAuto,:]
         
     # Apply cable gain corrections (if needed)
     if gain_correct:
-        for bl in range(output.shape[0]):
-            cableGain1 = antennas1[baselines[bl][0]].cable.gain(freq)
-            cableGain2 = antennas2[baselines[bl][1]].cable.gain(freq)
-            
-            output[:,bl,:] /= numpy.sqrt(cableGain1*cableGain2)
+        ## Compute the cable gains once per antenna rather than once per baseline
+        cableGains1 = numpy.array([a.cable.gain(freq) for a in antennas1])
+        cableGains2 = numpy.array([a.cable.gain(freq) for a in antennas2])
+        
+        ## Apply them to all baselines and Stokes parameters at once
+        output /= numpy.sqrt(cableGains1[baselines[:,0],:]*cableGains2[baselines[:,1],:])
             
     # Create antenna baseline list (if needed)
     if return_baselines:
-        antennaBaselines = []
-        for bl in range(output.shape[1]):
-            antennaBaselines.append( (antennas1[baselines[bl][0]], antennas2[baselines[bl][1]]) )
+        antennaBaselines = [(antennas1[i], antennas2[j]) for i,j in baselines.tolist()]
         returnValues = (antennaBaselines, freq, output)
     else:
         returnValues = (freq, output)
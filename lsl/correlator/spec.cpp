@@ -196,7 +196,7 @@ void compute_spec_complex(long nStand,
                                           *(data + 2*secStart - 2*nChan*(nTap-1) + 2*k + 1));
                     }
                     
-                    if( Clip && abs(in[k]) >= Clip ) {
+                    if( Clip && abs2(in[k]) >= (float) Clip*Clip ) {
                         cleanFactor = 0.0;
                     }
                     
@@ -234,7 +234,7 @@ void compute_stokes_complex(long nStand,
                                            *(dataY + 2*secStart - 2*nChan*(nTap-1) + 2*k + 1));
                     }
                     
-                    if( Clip && ( abs(inX[k]) >= Clip || abs(inY[k]) >= Clip ) ) {
+                    if( Clip && ( abs2(inX[k]) >= (float) Clip*Clip || abs2(inY[k]) >= (float) Clip*Clip ) ) {
                         cleanFactor = 0.0;
                     }
                     
@@ -647,9 +647,10 @@ void compute_xengine_three(long nStand,
     
     // Time-domain blanking control
     long nActVis;
+    float normVis;
     
     #ifdef _OPENMP
-        #pragma omp parallel default(shared) private(c, f, nActVis, tempVis1, tempVis2)
+        #pragma omp parallel default(shared) private(c, f, nActVis, normVis, tempVis1, tempVis2)
     #endif
     {
         #ifdef _OPENMP
@@ -660,23 +661,24 @@ void compute_xengine_three(long nStand,
             for(f=0; f<nFFT; f++) {
                 nActVis += (long) (*(validX+ mapper[bl][0]*nFFT + f) & *(validY + mapper[bl][1]*nFFT + f));
             }
+            normVis = 1.0 / (float) nActVis;
             
             for(c=0; c<nChan; c++) {
                 // I
                 blas_dotc_sub(nFFT, (dataX + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, (dataX + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, &tempVis1);
                 blas_dotc_sub(nFFT, (dataY + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, (dataY + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, &tempVis2);
-                *(dataA + 0*nBL*nChan + bl*nChan + c) = (tempVis1 + tempVis2) / (float) nActVis;
+                *(dataA + 0*nBL*nChan + bl*nChan + c) = (tempVis1 + tempVis2) * normVis;
                 
                 // Q
-                *(dataA + 1*nBL*nChan + bl*nChan + c) = (tempVis1 - tempVis2) / (float) nActVis;
+                *(dataA + 1*nBL*nChan + bl*nChan + c) = (tempVis1 - tempVis2) * normVis;
                 
                 // U
                 blas_dotc_sub(nFFT, (dataY + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, (dataX + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, &tempVis1);
                 blas_dotc_sub(nFFT, (dataX + mapper[bl][0]*nChan*nFFT + c*nFFT), 1, (dataY + mapper[bl][1]*nChan*nFFT + c*nFFT), 1, &tempVis2);
-                *(dataA + 2*nBL*nChan + bl*nChan + c) = (tempVis1 + tempVis2) / (float) nActVis;
+                *(dataA + 2*nBL*nChan + bl*nChan + c) = (tempVis1 + tempVis2) * normVis;
                 
                 // V
-                *(dataA + 3*nBL*nChan + bl*nChan + c) = (tempVis1 - tempVis2) / (float) nActVis / OutType(0,1);
+                *(dataA + 3*nBL*nChan + bl*nChan + c) = (tempVis1 - tempVis2) * normVis * OutType(0,-1);
             }
         }
     }
@@ -33,6 +33,7 @@ from astropy.coordinates import Angle as AstroAngle
 from astropy.coordinates import EarthLocation as AstroEarthLocation
 
 from lsl.common.stations import lwa1
+from lsl.misc.lru_cache import lru_cache
 
 from lsl.misc import telemetry
 telemetry.track_module()
@@ -45,6 +46,34 @@ __all__ = ['get_baselines', 'baseline_to_antennas', 'antennas_to_baseline', 'com
 speedOfLight = speedOfLight.to('m/s').value
 
 
+@lru_cache(maxsize=32)
+def _get_baseline_indices(N, include_auto=False):
+    """
+    Return the two index arrays that describe the baselines formed by N
+    antennas, in the same order as get_baselines.  The arrays are cached 
+    and returned as read-only arrays.
+    """
+    
+    if include_auto:
+        offset = 0
+    else:
+        offset = 1
+        
+    i, j = numpy.triu_indices(N, k=offset)
+    i.flags.writeable = False
+    j.flags.writeable = False
+    return i, j
+
+
+def _get_stand_positions(antennas):
+    """
+    Return a N by 3 numpy.float64 array of the stand positions, in meters, for
+    a list of antennas.
+    """
+    
+    return numpy.array([(a.stand.x, a.stand.y, a.stand.z) for a in antennas], dtype=numpy.float64).reshape(-1, 3)
+
+
 def get_baselines(antennas, antennas2=None, include_auto=False, indicies=False):
     """
     Generate a list of two-element tuples that describe which antennae
@@ -52,27 +81,24 @@ def get_baselines(antennas, antennas2=None, include_auto=False, indicies=False):
     If the indicies keyword is set to True, the two-element tuples 
     contain the indicies of the stands array used, rather than the actual
     stand numbers.
+    
+    .. versionchanged:: 3.0.0
+        Build the baseline list from numpy.triu_indices rather than a nested
+        loop.
     """
-
-    if include_auto:
-        offset = 0
-    else:
-        offset = 1
-
-    out = []
-    N = len(antennas)
     
-    # If we don't have an antennas2 array, use antennas again
-    if antennas2 is None:
-        antennas2 = antennas
+    i, j = _get_baseline_indices(len(antennas), include_auto=include_auto)
+    i, j = i.tolist(), j.tolist()
     
-    for i in range(0, N-offset):
-        for j in range(i+offset, N):
-            if indicies:
-                out.append( (i, j) )
-            else:
-                out.append( (antennas[i], antennas2[j]) )
-
+    if indicies:
+        out = list(zip(i, j))
+    else:
+        # If we don't have an antennas2 array, use antennas again
+        if antennas2 is None:
+            antennas2 = antennas
+            
+        out = [(antennas[k], antennas2[l]) for k,l in zip(i, j)]
+        
     return out
     
 
@@ -103,8 +129,28 @@ def antennas_to_baseline(ant1, ant2, antennas, antennas2=None, baseline_list=Non
     line listed was generated, convert the antenna pair to  a baseline number. 
     This utility is useful for picking out a particular pair from a list of
     baselines.
+    
+    .. versionchanged:: 3.0.0
+        Compute the baseline number directly when working with indicies and
+        a generated baseline list.
+        Fixed the lookup of auto-correlations so that it only matches the
+        auto-correlation baseline.
     """
     
+    # If we are working with indicies and a generated list of baselines we can 
+    # find the baseline number without building the list
+    if baseline_list is None and indicies:
+        if include_auto:
+            offset = 0
+        else:
+            offset = 1
+            
+        N = len(antennas)
+        i, j = min(ant1, ant2), max(ant1, ant2)
+        if i < 0 or j >= N or j - i < offset:
+            return -1
+        return i*(N-offset) - i*(i-1)//2 + j - i - offset
+        
     # If we don't have an antennas2 array, use antennas again
     if antennas2 is None:
         antennas2 = antennas
@@ -115,12 +161,10 @@ def antennas_to_baseline(ant1, ant2, antennas, antennas2=None, baseline_list=Non
     
     # Loop over the baselines until we find one that matches.  If we don't find 
     # one, return -1
-    i = 0
-    for baseline in baseline_list:
-        if ant1 in baseline and ant2 in baseline:
-            return i
-        i = i + 1
-        
+    for k,(i,j) in enumerate(baseline_list):
+        if (i == ant1 and j == ant2) or (i == ant2 and j == ant1):
+            return k
+            
     return -1
 
 
@@ -149,6 +193,9 @@ def compute_uvw(antennas, HA=0.0, dec=34.070, freq=49.0e6, site=lwa1, include_au
         Added support for ephem.Angle and astropy.coordinates.Angle instances 
         for HA and dec.
         Added support for astropy.coordinates.EarthLocation instances for site.
+        
+    .. versionchanged:: 3.0.0
+        Compute the coordinates for all baselines at once.
     """
     
     # Try this so that freq can be either a scalar, a list, or an array
@@ -158,11 +205,9 @@ def compute_uvw(antennas, HA=0.0, dec=34.070, freq=49.0e6, site=lwa1, include_au
     except (AttributeError, AssertionError):
         freq = numpy.array(freq, ndmin=1)
         
-    baselines = get_baselines(antennas, include_auto=include_auto, indicies=True)
-    Nbase = len(baselines)
-    Nfreq = freq.size
-    uvw = numpy.zeros((Nbase,3,Nfreq))
-
+    i, j = _get_baseline_indices(len(antennas), include_auto=include_auto)
+    Nbase = len(i)
+    
     # Phase center coordinates
     # Convert numbers to radians and, for HA, hours to degrees
     if isinstance(HA, ephem.Angle):
@@ -183,23 +228,28 @@ def compute_uvw(antennas, HA=0.0, dec=34.070, freq=49.0e6, site=lwa1, include_au
         lat2 = site.lat
     
     # Coordinate transformation matrices
-    trans1 = numpy.matrix([[0, -numpy.sin(lat2), numpy.cos(lat2)],
-                           [1,  0,               0],
-                           [0,  numpy.cos(lat2), numpy.sin(lat2)]])
-    trans2 = numpy.matrix([[ numpy.sin(HA2),                  numpy.cos(HA2),                 0],
-                           [-numpy.sin(dec2)*numpy.cos(HA2),  numpy.sin(dec2)*numpy.sin(HA2), numpy.cos(dec2)],
-                           [ numpy.cos(dec2)*numpy.cos(HA2), -numpy.cos(dec2)*numpy.sin(HA2), numpy.sin(dec2)]])
+    trans1 = numpy.array([[0, -numpy.sin(lat2), numpy.cos(lat2)],
+                          [1,  0,               0],
+                          [0,  numpy.cos(lat2), numpy.sin(lat2)]])
+    trans2 = numpy.array([[ numpy.sin(HA2),                  numpy.cos(HA2),                 0],
+                          [-numpy.sin(dec2)*numpy.cos(HA2),  numpy.sin(dec2)*numpy.sin(HA2), numpy.cos(dec2)],
+                          [ numpy.cos(dec2)*numpy.cos(HA2), -numpy.cos(dec2)*numpy.sin(HA2), numpy.sin(dec2)]])
                     
-    for k,(i,j) in enumerate(baselines):
-        # Go from a east, north, up coordinate system to a celestial equation, 
-        # east, north celestial pole system
-        xyzPrime = antennas[i].stand - antennas[j].stand
-        xyz = trans1*numpy.matrix([[xyzPrime[0]], [xyzPrime[1]], [xyzPrime[2]]])
-        
-        # Go from CE, east, NCP to u, v, w
-        temp = trans2*xyz
-        uvw[k,:,:] = temp[:,0] * freq.ravel() / speedOfLight
-        
+    # Combined transformation that goes from a east, north, up coordinate 
+    # system to a celestial equation, east, north celestial pole system and
+    # then from CE, east, NCP to u, v, w
+    trans = numpy.dot(trans2, trans1)
+    
+    # Apply it to all baselines at once
+    stands = _get_stand_positions(antennas)
+    xyzPrime = stands[i,:] - stands[j,:]
+    temp = numpy.dot(xyzPrime, trans.T)
+    
+    # Scale by the frequencies, working in place on a contiguous output array
+    uvw = numpy.empty((Nbase,3,freq.size), dtype=numpy.float64)
+    numpy.multiply(temp[:,:,numpy.newaxis], freq.ravel(), out=uvw)
+    uvw /= speedOfLight
+    
     uvw.shape = (Nbase,3)+freq.shape
     
     return uvw
@@ -227,11 +277,13 @@ def compute_uv_track(antennas, dec=34.070, freq=49.0e6, site=lwa1):
         Added support for ephem.Angle and astropy.coordinates.Angle instances 
         for dec.
         Added support for astropy.coordinates.EarthLocation instances for site.
+        
+    .. versionchanged:: 3.0.0
+        Compute the tracks for all baselines at once.
+        Fixed NaNs at the ends of the tracks.
     """
     
     N = len(antennas)
-    Nbase = N*(N-1)//2
-    uvTrack = numpy.zeros((Nbase,2,512))
     
     # Phase center coordinates
     # Convert numbers to radians and, for HA, hours to degrees
@@ -247,26 +299,32 @@ def compute_uv_track(antennas, dec=34.070, freq=49.0e6, site=lwa1):
         lat2 = site.lat
     
     # Coordinate transformation matrices
-    trans1 = numpy.matrix([[0, -numpy.sin(lat2), numpy.cos(lat2)],
-                           [1,  0,               0],
-                           [0,  numpy.cos(lat2), numpy.sin(lat2)]])
+    trans1 = numpy.array([[0, -numpy.sin(lat2), numpy.cos(lat2)],
+                          [1,  0,               0],
+                          [0,  numpy.cos(lat2), numpy.sin(lat2)]])
                     
-    count = 0
-    for i,j in get_baselines(antennas, indicies=True):
-        # Go from a east, north, up coordinate system to a celestial equation, 
-        # east, north celestial pole system
-        xyzPrime = antennas[i].stand - antennas[j].stand
-        xyz = trans1*numpy.matrix([[xyzPrime[0]],[xyzPrime[1]],[xyzPrime[2]]])
-        xyz = numpy.ravel(xyz)
-        
-        uRange = numpy.linspace(-numpy.sqrt(xyz[0]**2 + xyz[1]**2), numpy.sqrt(xyz[0]**2 + xyz[1]**2), num=256)
-        vRange1 = numpy.sqrt(xyz[0]**2 + xyz[1]**2 - uRange**2)*numpy.sin(dec2) + xyz[2]*numpy.cos(dec2)
-        vRange2 = -numpy.sqrt(xyz[0]**2 + xyz[1]**2 - uRange**2)*numpy.sin(dec2) + xyz[2]*numpy.cos(dec2)
-        
-        uvTrack[count,0,0:256] = uRange * freq / numpy.array(speedOfLight)
-        uvTrack[count,1,0:256] = vRange1 * freq / numpy.array(speedOfLight)
-        uvTrack[count,0,256:512] = uRange[::-1] * freq / numpy.array(speedOfLight)
-        uvTrack[count,1,256:512] = vRange2[::-1] * freq / numpy.array(speedOfLight)
-        count = count + 1
-        
+    # Go from a east, north, up coordinate system to a celestial equation, 
+    # east, north celestial pole system for all baselines at once
+    i, j = _get_baseline_indices(N)
+    Nbase = len(i)
+    stands = _get_stand_positions(antennas)
+    xyzPrime = stands[i,:] - stands[j,:]
+    xyz = numpy.dot(xyzPrime, trans1.T)
+    
+    # Trace out the ellipses.  The argument of the square root is clipped at
+    # zero so that round off at the ends of the tracks does not produce NaNs.
+    rho2 = (xyz[:,0]**2 + xyz[:,1]**2)[:,numpy.newaxis]
+    vCenter = (xyz[:,2]*numpy.cos(dec2))[:,numpy.newaxis]
+    uRange = numpy.linspace(-numpy.sqrt(rho2[:,0]), numpy.sqrt(rho2[:,0]), num=256, axis=1)
+    vOffset = numpy.sqrt(numpy.maximum(rho2 - uRange**2, 0.0))*numpy.sin(dec2)
+    vRange1 = vOffset + vCenter
+    vRange2 = -vOffset + vCenter
+    
+    # Every element of the output is filled in below
+    uvTrack = numpy.empty((Nbase,2,512), dtype=numpy.float64)
+    uvTrack[:,0,0:256] = uRange * freq / speedOfLight
+    uvTrack[:,1,0:256] = vRange1 * freq / speedOfLight
+    uvTrack[:,0,256:512] = uRange[:,::-1] * freq / speedOfLight
+    uvTrack[:,1,256:512] = vRange2[:,::-1] * freq / speedOfLight
+    
     return uvTrack
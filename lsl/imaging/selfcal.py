@@ -39,24 +39,45 @@ def _scale_data(dataSet, amps, delays, phase_offsets):
     delayed dictionary.
     """
 
-    import copy
-
     # Build the data dictionary to hold the scaled and delayed data
     sclData = dataSet.copy(include_pols=True)
     fq = dataSet.freq / 1e9
     
-    cGains = []
-    for i in range(len(amps)):
-        cGains.append( amps[i]*numpy.exp(2j*numpy.pi*fq*delays[i] + 1j*phase_offsets[i]) )
-
+    # Complex gains for all antennas and the corresponding baseline gains.  
+    # These are stored at the precision of the visibility data so that single
+    # precision data are not scaled with double precision gains.
+    dtype = numpy.result_type(numpy.complex64, *[pds.data.dtype for pds in sclData])
+    amps = numpy.asarray(amps)[:,numpy.newaxis]
+    delays = numpy.asarray(delays)[:,numpy.newaxis]
+    phase_offsets = numpy.asarray(phase_offsets)[:,numpy.newaxis]
+    if numpy.any(delays != 0):
+        cGains = amps*numpy.exp(2j*numpy.pi*fq*delays + 1j*phase_offsets)
+    else:
+        ## Without delays the gains are the same for all channels so they only
+        ## need to be evaluated once per antenna
+        cGains = amps*numpy.exp(1j*phase_offsets)
+    cGains = cGains.astype(dtype)
+    
+    bls = numpy.array(sclData.baselines, dtype=numpy.intp).reshape(-1, 2)
+    blGains = cGains[bls[:,1],:].conj()*cGains[bls[:,0],:]
+    
     # Apply the scales and delays for all polarization pairs found in the original data
     for pds in sclData:
-        for b,(i,j) in enumerate(sclData.baselines):
-            pds.data[b,:] *= cGains[j].conj()*cGains[i]
-            
+        pds.data *= blGains
+        
     return sclData
 
 
+def _reference_columns(ants, ref_ant):
+    """
+    Given an array of antenna indicies, return the corresponding column 
+    indicies in a matrix that excludes the reference antenna and a boolean 
+    array of which entries are not the reference antenna.
+    """
+    
+    return ants - (ants > ref_ant), ants != ref_ant
+
+
 def _build_amplitude_a(aa, dataSet, simSet, chan, pol, ref_ant=0):
     """
     Build the matrix A for amplitude correction.
@@ -69,16 +90,18 @@ def _build_amplitude_a(aa, dataSet, simSet, chan, pol, ref_ant=0):
     # Frequency in GHz so that the delays can be in ns
     fq = dataSet.freq[chan] / 1e9
     
+    # Baseline antenna indicies for each row of A
+    bls = numpy.array(dataSet.baselines, dtype=numpy.intp).reshape(-1, 2)
+    rows = numpy.arange(nBLs)
+    
     A = numpy.zeros((nBLs, nStands))
-    for i,(l,m) in enumerate(dataSet.baselines):
-        A[i,l] = 1.0
-        A[i,m] = 1.0
-        
-    A = numpy.matrix(A)
+    A[rows,bls[:,0]] = 1.0
+    A[rows,bls[:,1]] = 1.0
+    
     return A
 
 
-def _build_amplitude_c(aa, dataSet, simSet, chan, pol, ref_ant=0):
+def _build_amplitude_c(aa, dataSet, simVis, chan, pol, ref_ant=0):
     """
     Build the matrix C for the amplitude correction.
     """
@@ -90,25 +113,23 @@ def _build_amplitude_c(aa, dataSet, simSet, chan, pol, ref_ant=0):
     # Frequency in GHz so that the delays can be in ns
     fq = dataSet.freq[chan] / 1e9
     
-    obsVis = []
-    for vis in getattr(dataSet, pol).data:
-        obsVis.append( numpy.array(vis[chan]) )
-    obsVis = numpy.array(obsVis)
-    
-    simVis = []
-    for vis in getattr(simSet, pol).data:
-        simVis.append( numpy.array(vis[chan]) )
-    simVis = numpy.array(simVis)
+    obsVis = numpy.asarray(getattr(dataSet, pol).data)[:,chan]
     
     C = numpy.log(numpy.abs(simVis / obsVis))
     
-    Cp = numpy.zeros(nBLs)
-    for i in range(C.shape[0]):
-        try:
-            Cp[i] = robust.mean(C[i,:])
-        except ValueError:
-            Cp[i] = numpy.mean(C[i,:])
-            
+    try:
+        # Try all of the baselines at once...
+        Cp = robust.mean(C, axis=1)
+    except ValueError:
+        # ... and fall back to one baseline at a time if one of them has a
+        # strange distribution
+        Cp = numpy.zeros(nBLs)
+        for i in range(C.shape[0]):
+            try:
+                Cp[i] = robust.mean(C[i,:])
+            except ValueError:
+                Cp[i] = numpy.mean(C[i,:])
+                
     return Cp
 
 
@@ -125,31 +146,25 @@ def _build_phaseonly_a(aa, dataSet, simSet, chan, pol, ref_ant=0):
     # Frequency in GHz so that the delays can be in ns
     fq = dataSet.freq[chan] / 1e9
     
+    # Baseline antenna indicies for each row of A
+    bls = numpy.array(dataSet.baselines, dtype=numpy.intp).reshape(-1, 2)
+    l = numpy.tile(bls[:,0], fq.size)
+    m = numpy.tile(bls[:,1], fq.size)
+    rows = numpy.arange(nBLs*fq.size)
+    
     A = numpy.zeros((nBLs*fq.size, nStands-1))
-    for i in range(fq.size):
-        for j,(l,m) in enumerate(dataSet.baselines):
-            if l < ref_ant:
-                A[j+i*nBLs,l]   =  1.0
-            elif l > ref_ant:
-                A[j+i*nBLs,l-1] =  1.0
-            else:
-                pass
-                
-            if m < ref_ant:
-                A[j+i*nBLs,m]   = -1.0
-            elif m > ref_ant:
-                A[j+i*nBLs,m-1] = -1.0
-            else:
-                pass
-        
-    A = numpy.matrix(A)
+    col, valid = _reference_columns(l, ref_ant)
+    A[rows[valid],col[valid]] =  1.0
+    col, valid = _reference_columns(m, ref_ant)
+    A[rows[valid],col[valid]] = -1.0
+    
     return A
 
 
-def _build_phaseonly_c(aa, dataSet, simSet, chan, pol, ref_ant=0):
+def _build_phase_c(aa, dataSet, simVis, chan, pol, ref_ant=0):
     """
-    Build the matrix C for phase correction with a frequency independent
-    phase.
+    Build the matrix C for phase correction.  This is shared by the phase-
+    only, delay-only, and delay/phase offset corrections.
     """
     
     # Get the baseline and stand counts
@@ -159,22 +174,17 @@ def _build_phaseonly_c(aa, dataSet, simSet, chan, pol, ref_ant=0):
     # Frequency in GHz so that the delays can be in ns
     fq = dataSet.freq[chan] / 1e9
     
-    obsVis = []
-    for vis in getattr(dataSet, pol).data:
-        obsVis.append( numpy.array(vis[chan]) )
-    obsVis = numpy.array(obsVis)
-    
-    simVis = []
-    for vis in getattr(simSet, pol).data:
-        simVis.append( numpy.array(vis[chan]) )
-    simVis = numpy.array(simVis)
+    obsVis = numpy.asarray(getattr(dataSet, pol).data)[:,chan]
     
-    C = numpy.angle(simVis / obsVis)
+    # Phase difference between the simulated and observed visibilities.  Zero-
+    # valued observations carry no phase information so they are flagged as 
+    # NaN and dropped from the fit.
+    C = numpy.angle(simVis * obsVis.conj())
+    C[obsVis == 0] = numpy.nan
     
-    Cp = numpy.zeros(nBLs*fq.size)
-    for i in range(fq.size):
-        for j in range(C.shape[0]):
-            Cp[j+i*nBLs] = C[j,i]
+    # Reorder to match the rows of A, i.e., all baselines for the first 
+    # frequency, then all baselines for the second frequency, etc.
+    Cp = numpy.array(C.T, dtype=numpy.float64, order='C').ravel()
     
     return Cp
 
@@ -191,57 +201,22 @@ def _build_delayonly_a(aa, dataSet, simSet, chan, pol, ref_ant=0):
     # Frequency in GHz so that the delays can be in ns
     fq = dataSet.freq[chan] / 1e9
     
-    A = numpy.zeros((nBLs*fq.size, nStands-1))
-    for i in range(fq.size):
-        for j,(l,m) in enumerate(dataSet.baselines):
-            if l < ref_ant:
-                A[j+i*nBLs,l]   =  2*numpy.pi*fq[i]
-            elif l > ref_ant:
-                A[j+i*nBLs,l-1] =  2*numpy.pi*fq[i]
-            else:
-                pass
-                
-            if m < ref_ant:
-                A[j+i*nBLs,m]   = -2*numpy.pi*fq[i]
-            elif m > ref_ant:
-                A[j+i*nBLs,m-1] = -2*numpy.pi*fq[i]
-            else:
-                pass
-        
-    A = numpy.matrix(A)
-    return A
-
-
-def _build_delayonly_c(aa, dataSet, simSet, chan, pol, ref_ant=0):
-    """
-    Build the matrix C for phase correction with a delay.
-    """
+    # Baseline antenna indicies for each row of A
+    bls = numpy.array(dataSet.baselines, dtype=numpy.intp).reshape(-1, 2)
+    l = numpy.tile(bls[:,0], fq.size)
+    m = numpy.tile(bls[:,1], fq.size)
+    rows = numpy.arange(nBLs*fq.size)
     
-    # Get the baseline and stand counts
-    nBLs = dataSet.nbaseline
-    nStands = len(aa.ants)
-    
-    # Frequency in GHz so that the delays can be in ns
-    fq = dataSet.freq[chan] / 1e9
+    # Phase slope for each row of A
+    slope = numpy.repeat(2*numpy.pi*fq, nBLs)
     
-    obsVis = []
-    for vis in getattr(dataSet, pol).data:
-        obsVis.append( numpy.array(vis[chan]) )
-    obsVis = numpy.array(obsVis)
-    
-    simVis = []
-    for vis in getattr(simSet, pol).data:
-        simVis.append( numpy.array(vis[chan]) )
-    simVis = numpy.array(simVis)
-    
-    C = numpy.angle(simVis / obsVis)
-    
-    Cp = numpy.zeros(nBLs*fq.size)
-    for i in range(fq.size):
-        for j in range(C.shape[0]):
-            Cp[j+i*nBLs] = C[j,i]
+    A = numpy.zeros((nBLs*fq.size, nStands-1))
+    col, valid = _reference_columns(l, ref_ant)
+    A[rows[valid],col[valid]] =  slope[valid]
+    col, valid = _reference_columns(m, ref_ant)
+    A[rows[valid],col[valid]] = -slope[valid]
     
-    return Cp
+    return A
 
 
 def _build_delayandphase_a(aa, dataSet, simSet, chan, pol, ref_ant=0):
@@ -256,62 +231,24 @@ def _build_delayandphase_a(aa, dataSet, simSet, chan, pol, ref_ant=0):
     # Frequency in GHz so that the delays can be in ns
     fq = dataSet.freq[chan] / 1e9
     
-    A = numpy.zeros((nBLs*fq.size, 2*(nStands-1)))
-    for i in range(fq.size):
-        for j,(l,m) in enumerate(dataSet.baselines):
-            if l < ref_ant:
-                A[j+i*nBLs,l]   =  2*numpy.pi*fq[i]
-                A[j+i*nBLs,l+(nStands-1)] = 1.0
-            elif l > ref_ant:
-                A[j+i*nBLs,l-1] =  2*numpy.pi*fq[i]
-                A[j+i*nBLs,l-1+(nStands-1)] = 1.0
-                
-            else:
-                pass
-                
-            if m < ref_ant:
-                A[j+i*nBLs,m]   = -2*numpy.pi*fq[i]
-                A[j+i*nBLs,m+(nStands-1)] = -1.0
-            elif m > ref_ant:
-                A[j+i*nBLs,m-1] = -2*numpy.pi*fq[i]
-                A[j+i*nBLs,m-1+(nStands-1)] = -1.0
-            else:
-                pass
-        
-    A = numpy.matrix(A)
-    return A
-
-
-def _build_delayandphase_c(aa, dataSet, simSet, chan, pol, ref_ant=0):
-    """
-    Build the matrix C for phase correction with a delay and a phase offset.
-    """
-    
-    # Get the baseline and stand counts
-    nBLs = dataSet.nbaseline
-    nStands = len(aa.ants)
-    
-    # Frequency in GHz so that the delays can be in ns
-    fq = dataSet.freq[chan] / 1e9
-    
-    obsVis = []
-    for vis in getattr(dataSet, pol).data:
-        obsVis.append( numpy.array(vis[chan]) )
-    obsVis = numpy.array(obsVis)
-    
-    simVis = []
-    for vis in getattr(simSet, pol).data:
-        simVis.append( numpy.array(vis[chan]) )
-    simVis = numpy.array(simVis)
+    # Baseline antenna indicies for each row of A
+    bls = numpy.array(dataSet.baselines, dtype=numpy.intp).reshape(-1, 2)
+    l = numpy.tile(bls[:,0], fq.size)
+    m = numpy.tile(bls[:,1], fq.size)
+    rows = numpy.arange(nBLs*fq.size)
     
-    C = numpy.angle(simVis / obsVis)
+    # Phase slope for each row of A
+    slope = numpy.repeat(2*numpy.pi*fq, nBLs)
     
-    Cp = numpy.zeros(nBLs*fq.size)
-    for i in range(fq.size):
-        for j in range(C.shape[0]):
-            Cp[j+i*nBLs] = C[j,i]
+    A = numpy.zeros((nBLs*fq.size, 2*(nStands-1)))
+    col, valid = _reference_columns(l, ref_ant)
+    A[rows[valid],col[valid]] =  slope[valid]
+    A[rows[valid],col[valid]+(nStands-1)] = 1.0
+    col, valid = _reference_columns(m, ref_ant)
+    A[rows[valid],col[valid]] = -slope[valid]
+    A[rows[valid],col[valid]+(nStands-1)] = -1.0
     
-    return Cp
+    return A
 
 
 def _self_cal(aa, dataSet, simSet, chan, pol, ref_ant=0, max_iter=30, amplitude=False, phase_only=False, delay_only=False, delay_and_phase=False, amplitude_cutoff=1.001, phase_cutoff=0.01, delay_cutoff=0.2, verbose=True):
@@ -373,6 +310,21 @@ def _self_cal(aa, dataSet, simSet, chan, pol, ref_ant=0, max_iter=30, amplitude=
     # Frequency in GHz so that the delays can be in ns
     fq = dataSet.freq[chan] / 1e9
     
+    # The simulated visibilities for the channels of interest do not change 
+    # between iterations so they only need to be extracted once
+    simVis = numpy.asarray(getattr(simSet, pol).data)[:,chan]
+    
+    # The A matrices only depend on the baselines, frequencies, and reference
+    # antenna so they can be built once outside of the iteration loop
+    if amplitude:
+        ampA = _build_amplitude_a(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
+    if phase_only:
+        phsA = _build_phaseonly_a(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
+    elif delay_only:
+        phsA = _build_delayonly_a(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
+    elif delay_and_phase:
+        phsA = _build_delayandphase_a(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
+        
     converged = False
     tempGains = numpy.ones(N)
     tempDelays = numpy.zeros(N)
@@ -388,11 +340,10 @@ def _self_cal(aa, dataSet, simSet, chan, pol, ref_ant=0, max_iter=30, amplitude=
             if verbose:
                 print('  %iA' % (i+1,))
                 
-            A = _build_amplitude_a(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
-            C = _build_amplitude_c(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
+            C = _build_amplitude_c(aa, dataSet, simVis, chan, pol, ref_ant=ref_ant)
             
             good = numpy.where( numpy.isfinite(C) == 1 )[0]
-            A = A[good,:]
+            A = ampA[good,:]
             C = C[good]
             
             bestGains, resid, rank, s = numpy.linalg.lstsq(A, C)
@@ -418,23 +369,20 @@ def _self_cal(aa, dataSet, simSet, chan, pol, ref_ant=0, max_iter=30, amplitude=
             if verbose:
                 print('  %iP' % (i+1,))
                 
-            A = _build_phaseonly_a(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
-            C = _build_phaseonly_c(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
+            C = _build_phase_c(aa, dataSet, simVis, chan, pol, ref_ant=ref_ant)
             
             good = numpy.where( numpy.isfinite(C) == 1 )[0]
-            A = A[good,:]
+            A = phsA[good,:]
             C = C[good]
             
             bestPhaseOffsets, resid, rank, s = numpy.linalg.lstsq(A, C)
             resid = numpy.array(C - numpy.dot(A, bestPhaseOffsets)).ravel()
             resid = (C**2).sum(), (resid**2).sum()
             
-            bestPhaseOffsets = list(bestPhaseOffsets)
-            bestPhaseOffsets.insert(ref_ant, 0.0)
-            bestPhaseOffsets = numpy.array(bestPhaseOffsets)
+            bestPhaseOffsets = numpy.insert(bestPhaseOffsets, ref_ant, 0.0)
             tempPhaseOffsets += bestPhaseOffsets
             
-            valid = valid = numpy.where( numpy.abs(bestPhaseOffsets) < 1e6 )[0]
+            valid = numpy.where( numpy.abs(bestPhaseOffsets) < 1e6 )[0]
             metric = (numpy.abs(bestPhaseOffsets[valid])).max()
             if verbose:
                 print('    ', metric)
@@ -448,20 +396,17 @@ def _self_cal(aa, dataSet, simSet, chan, pol, ref_ant=0, max_iter=30, amplitude=
             if verbose:
                 print('  %iD' % (i+1,))
                 
-            A = _build_delayonly_a(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
-            C = _build_delayonly_c(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
+            C = _build_phase_c(aa, dataSet, simVis, chan, pol, ref_ant=ref_ant)
             
             good = numpy.where( numpy.isfinite(C) == 1 )[0]
-            A = A[good,:]
+            A = phsA[good,:]
             C = C[good]
             
             bestDelays, resid, rank, s = numpy.linalg.lstsq(A, C)
             resid = numpy.array(C - numpy.dot(A, bestDelays)).ravel()
             resid = (C**2).sum(), (resid**2).sum()
             
-            bestDelays = list(bestDelays)
-            bestDelays.insert(ref_ant, 0.0)
-            bestDelays = numpy.array(bestDelays)
+            bestDelays = numpy.insert(bestDelays, ref_ant, 0.0)
             tempDelays += bestDelays
             
             valid = numpy.where( numpy.abs(bestDelays) < 1e6 )[0]
@@ -478,25 +423,20 @@ def _self_cal(aa, dataSet, simSet, chan, pol, ref_ant=0, max_iter=30, amplitude=
             if verbose:
                 print('  %iD+P' % (i+1,))
                 
-            A = _build_delayandphase_a(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
-            C = _build_delayandphase_c(aa, dataSet, simSet, chan, pol, ref_ant=ref_ant)
+            C = _build_phase_c(aa, dataSet, simVis, chan, pol, ref_ant=ref_ant)
             
             good = numpy.where( numpy.isfinite(C) == 1 )[0]
-            A = A[good,:]
+            A = phsA[good,:]
             C = C[good]
             
             bestDelaysAndPhaseOffsets, resid, rank, s = numpy.linalg.lstsq(A, C)
             resid = numpy.array(C - numpy.dot(A, bestDelaysAndPhaseOffsets)).ravel()
             resid = (C**2).sum(), (resid**2).sum()
             
-            bestDelays = list(bestDelaysAndPhaseOffsets[:(N-1)])
-            bestDelays.insert(ref_ant, 0.0)
-            bestDelays = numpy.array(bestDelays)
+            bestDelays = numpy.insert(bestDelaysAndPhaseOffsets[:(N-1)], ref_ant, 0.0)
             tempDelays += bestDelays
             
-            bestPhaseOffsets = list(bestDelaysAndPhaseOffsets[(N-1):])
-            bestPhaseOffsets.insert(ref_ant, 0.0)
-            bestPhaseOffsets = numpy.array(bestPhaseOffsets)
+            bestPhaseOffsets = numpy.insert(bestDelaysAndPhaseOffsets[(N-1):], ref_ant, 0.0)
             tempPhaseOffsets += bestPhaseOffsets
             
             valid = numpy.where( numpy.abs(bestDelays) < 1e6 )[0]
@@ -10,6 +10,7 @@ if sys.version_info < (3,):
     
 import time
 import numpy
+import struct
 from aipy import coord as aipycoord
 from astropy.constants import c as speedOfLight
 
@@ -21,6 +22,7 @@ from lsl.sim import drx
 from lsl.sim import vis
 from lsl.reader.tbn import FILTER_CODES as TBNFilters
 from lsl.reader.drx import FILTER_CODES as DRXFilters
+from lsl.reader.base import CI8
 
 from lsl.misc import telemetry
 telemetry.track_module()
@@ -31,6 +33,68 @@ __version__ = '0.5'
 __all__ = ['basic_signal', 'point_source']
 
 
+def _quantize(data, nbit):
+    """
+    Private function to round and clip complex data to signed integers with
+    the specified number of bits.  The data are returned as a CI8 array.
+    """
+    
+    upper = 2**(nbit-1) - 1
+    
+    iq = numpy.empty(data.shape, dtype=CI8)
+    for part,field in ((data.real, 're'), (data.imag, 'im')):
+        temp = numpy.rint(part)
+        numpy.clip(temp, -upper-1, upper, out=temp)
+        iq[field] = temp
+    return iq
+
+
+def _get_raw_frames(frames, nsamples, obs_time):
+    """
+    Private function to build a collection of raw frames, one per SimFrame in
+    the (possibly nested) list of frames.  These raw frames are used as 
+    templates that can be updated with _update_tbn_frames or 
+    _update_drx_frames.
+    """
+    
+    frames = numpy.array(frames, dtype=object)
+    
+    rawFrames = None
+    for idx in numpy.ndindex(*frames.shape):
+        cFrame = frames[idx]
+        cFrame.frame_count = 1
+        cFrame.obs_time = obs_time
+        cFrame.data = numpy.zeros(nsamples, dtype=CI8)
+        rawFrame = cFrame.create_raw_frame()
+        if rawFrames is None:
+            rawFrames = numpy.empty(frames.shape+rawFrame.shape, dtype=numpy.uint8)
+        rawFrames[idx] = rawFrame
+    return rawFrames
+
+
+def _update_tbn_frames(rawFrames, frame_count, obs_time, data):
+    """
+    Private function to update a collection of raw TBN frames with a new 
+    frame count, time tag, and CI8 data.  All of the other header fields
+    are left unchanged.
+    """
+    
+    rawFrames[...,5:8] = numpy.frombuffer(struct.pack('>I', frame_count & 0xFFFFFF), dtype=numpy.uint8)[1:]
+    rawFrames[...,16:24] = numpy.frombuffer(struct.pack('>Q', obs_time), dtype=numpy.uint8)
+    rawFrames[...,24:] = data.view(numpy.uint8).reshape(rawFrames.shape[:-1]+(-1,))
+    
+
+def _update_drx_frames(rawFrames, obs_time, data):
+    """
+    Private function to update a collection of raw DRX frames with a new 
+    time tag and CI8 data.  All of the other header fields are left 
+    unchanged.
+    """
+    
+    rawFrames[...,16:24] = numpy.frombuffer(struct.pack('>Q', obs_time), dtype=numpy.uint8)
+    rawFrames[...,32:] = ((data['re'] & 0xF) << 4) | (data['im'] & 0xF)
+
+
 def _basic_tbn(fh, stands, nframes, **kwargs):
     """
     Private function for generating a basic TBN signal.
@@ -51,24 +115,37 @@ def _basic_tbn(fh, stands, nframes, **kwargs):
         print("Simulating %i frames of TBN Data @ %.2f kHz for %i stands:" % \
             (nframes, sample_rate/1e3, len(stands)))
     
+    # The tone over the course of a single frame.  This only needs to be 
+    # rotated to the start time of each frame
+    toneFrame = maxValue*numpy.exp(2j*numpy.pi*upperSpike*numpy.arange(samplesPerFrame) / sample_rate)
+    
+    # Time tag of the first frame and the number of ticks between frames
+    t0 = int(start_time*dp_common.fS)
+    tStep = dp_common.fS*samplesPerFrame/sample_rate
+    
+    # Setup the raw frames for all stands once and then update them as we go.
+    # NB:  Stand/pol labels in the TBN data are based on the digitizer not
+    # the stand
+    frames = [tbn.SimFrame(stand=(stand.digitizer - 1) // 2 + 1, pol=(stand.digitizer - 1) % 2, central_freq=40e6, gain=20) for stand in stands]
+    rawFrames = _get_raw_frames(frames, samplesPerFrame, t0)
+    
     for i in range(nframes):
         if i % 1000 == 0 and verbose:
             print(" frame %i" % (i+1))
-        t = int(start_time*dp_common.fS) + int(i*dp_common.fS*samplesPerFrame/sample_rate)
-        tFrame = t/dp_common.fS - start_time + numpy.arange(samplesPerFrame, dtype=numpy.float32) / sample_rate
+        t = t0 + int(i*tStep)
         
-        for j,stand in enumerate(stands):
-            ## NB:  Stand/pol labels in the TBN data are based on the digitizer not
-            ## the stand
-            stand_id = (stand.digitizer - 1) // 2 + 1
-            pol_id = (stand.digitizer - 1) % 2
-            
-            cFrame = tbn.SimFrame(stand=stand_id, pol=pol_id, central_freq=40e6, gain=20, frame_count=i+1, obs_time=t)
-            cFrame.data = numpy.zeros(samplesPerFrame, dtype=numpy.singlecomplex)
-            cFrame.data += numpy.random.randn(samplesPerFrame) + 1j*numpy.random.randn(samplesPerFrame)
-            cFrame.data *= maxValue*noise_strength
-            cFrame.data += maxValue*numpy.exp(2j*numpy.pi*upperSpike*tFrame)
-            cFrame.write_raw_frame(fh)
+        # Build the data for all stands at once - the tone is the same for
+        # every stand and the noise draws are in the same order as they would
+        # be if they were done one stand at a time
+        tone = toneFrame * numpy.exp(2j*numpy.pi*upperSpike*(t/dp_common.fS - start_time))
+        noise = numpy.random.randn(len(stands), 2, samplesPerFrame)
+        data = (noise[:,0,:] + 1j*noise[:,1,:]).astype(numpy.singlecomplex)
+        data *= maxValue*noise_strength
+        data += tone
+        data = _quantize(data, 8)
+        
+        _update_tbn_frames(rawFrames, i+1, t, data)
+        rawFrames.tofile(fh)
 
 
 def _basic_drx(fh, stands, nframes, **kwargs):
@@ -95,32 +172,42 @@ def _basic_drx(fh, stands, nframes, **kwargs):
         print("Simulating %i frames of DRX Data @ %.2f MHz for %i beams, %i tunings each:" % \
             (nframes, sample_rate/1e6, len(stands), ntuning))
 
+    # Setup the tones for each tuning/polarization pair
+    spikes = [(upperSpike1, lowerSpike1), (lowerSpike2, upperSpike2)]
+    spikes = numpy.array([spikes[0 if tune == 1 else 1] for tune in range(1, ntuning+1)])
+    spikes.shape += (1,)
+    
+    # The tones over the course of a single frame.  These only need to be 
+    # rotated to the start time of each frame
+    tonesFrame = maxValue*numpy.exp(2j*numpy.pi*spikes*numpy.arange(samplesPerFrame) / sample_rate)
+    
+    # Time tag of the first frame and the number of ticks between frames
+    t0 = int(start_time*dp_common.fS)
+    tStep = dp_common.fS*samplesPerFrame/sample_rate
+    
+    # Setup the raw frames for each beam/tuning/polarization once and then 
+    # update them as we go
     beams = stands
+    frames = [[[drx.SimFrame(beam=beam, tune=tune, pol=pol, decimation=decimation, time_offset=0, flags=0) for pol in (0, 1)] for tune in range(1, ntuning+1)] for beam in beams]
+    rawFrames = _get_raw_frames(frames, samplesPerFrame, t0)
+    
     for i in range(nframes):
         if i % 1000 == 0 and verbose:
             print(" frame %i" % i)
-        t = int(start_time*dp_common.fS) + int(i*dp_common.fS*samplesPerFrame/sample_rate)
-        tFrame = t/dp_common.fS - start_time + numpy.arange(samplesPerFrame, dtype=numpy.float32) / sample_rate
-        for beam in beams:
-            for tune in range(1, ntuning+1):
-                for pol in (0, 1):
-                    if tune == 1:
-                        if pol == 0:
-                            spike = upperSpike1
-                        else:
-                            spike = lowerSpike1
-                    else:
-                        if pol == 0:
-                            spike = lowerSpike2
-                        else:
-                            spike = upperSpike2
-                            
-                    cFrame = drx.SimFrame(beam=beam, tune=tune, pol=pol, frame_count=i+1, decimation=decimation, time_offset=0, obs_time=t, flags=0)
-                    cFrame.data = numpy.zeros(samplesPerFrame, dtype=numpy.singlecomplex)
-                    cFrame.data += numpy.random.randn(samplesPerFrame) + 1j*numpy.random.randn(samplesPerFrame)
-                    cFrame.data *= maxValue*noise_strength
-                    cFrame.data += maxValue*numpy.exp(2j*numpy.pi*spike*tFrame)
-                    cFrame.write_raw_frame(fh)
+        t = t0 + int(i*tStep)
+        
+        # Build the data for all beams at once - the tones only depend on the
+        # tuning and polarization and the noise draws are in the same order as
+        # they would be if they were done one frame at a time
+        tones = tonesFrame * numpy.exp(2j*numpy.pi*spikes*(t/dp_common.fS - start_time))
+        noise = numpy.random.randn(len(beams), ntuning, 2, 2, samplesPerFrame)
+        data = (noise[:,:,:,0,:] + 1j*noise[:,:,:,1,:]).astype(numpy.singlecomplex)
+        data *= maxValue*noise_strength
+        data += tones
+        data = _quantize(data, 4)
+        
+        _update_drx_frames(rawFrames, t, data)
+        rawFrames.tofile(fh)
 
 
 def basic_signal(fh, stands, nframes, station=lwa_common.lwa1, mode='DRX', filter=6, ntuning=2, start_time=0, noise_strength=0.1, verbose=False):
@@ -180,17 +267,22 @@ def _get_antennaarray(station, stands, utime, freqs):
 def _get_source_parameters(aa, timestamp, srcs):
     """
     Given an aipy AntennaArray object, an observation time, and aipy.src 
-    object, return all of the parameters needed for a simulation.
+    object, return all of the parameters needed for a simulation.  The 
+    parameters are returned as a dictionary of arrays with sources along
+    the first axis.
     """
     
     # Set the time for the array
     aa.set_unixtime(timestamp)
-
+    
+    # Get the frequencies and the channel closest to 1 MHz
+    frq = aa.get_afreqs()					# nu
+    best1MHz = numpy.argmin( numpy.abs(frq-0.001) )
+    
     # Compute the source parameters
     srcs_tp = []
     srcs_mt = []
     srcs_jy = []
-    srcs_fq = []
     for name in srcs:
         ## Update the source's coordinates
         src = srcs[name]
@@ -200,13 +292,11 @@ def _get_source_parameters(aa, timestamp, srcs):
         top = src.get_crds(crdsys='top', ncrd=3)	# topo. coords.
         mat = src.map							# equitorial -> topo. rotation matrix
         jys = src.get_jys()						# F_nu
-        frq = aa.get_afreqs()					# nu
-
+        
         ## Fix the lowest frequencies to avoid problems with the flux blowing up
         ## at nu = 0 Hz by replacing flux values below 1 MHz with the flux at 
         ## 1 MHz
-        Jyat1MHz = jys[ numpy.where( numpy.abs(frq-0.001) == numpy.abs(frq-0.001).min() ) ]
-        jys = numpy.where( frq >= 0.001, jys, Jyat1MHz )
+        jys = numpy.where( frq >= 0.001, jys, jys[best1MHz] )
 
         ## Filter out sources that are below the horizon or have no flux
         srcAzAlt = aipycoord.top2azalt(top)
@@ -217,57 +307,105 @@ def _get_source_parameters(aa, timestamp, srcs):
         srcs_tp.append( top )
         srcs_mt.append( mat )
         srcs_jy.append( jys )
-        srcs_fq.append( frq )
-
+        
+    # Stack the values into arrays
+    nSrc = len(srcs_tp)
+    srcs_tp = numpy.array(srcs_tp, dtype=numpy.float64).reshape(nSrc, 3)
+    srcs_mt = numpy.array(srcs_mt, dtype=numpy.float64).reshape(nSrc, 3, 3)
+    srcs_jy = numpy.array(srcs_jy, dtype=numpy.float64).reshape(nSrc, frq.size)
+    srcs_fq = numpy.repeat(frq.reshape(1, frq.size), nSrc, axis=0)
+    
     # Return the values as a dictionary
     return {'topo': srcs_tp, 'trans': srcs_mt, 'flux': srcs_jy, 'freq': srcs_fq}
 
 
-def _build_signals(aa, stands, src_params, times):
+def _get_cable_parameters(aa, stands):
+    """
+    Given an aipy AntennaArray and a list of stands, return the cable delays 
+    in ns and the cable gains for each stand at each frequency as two 
+    Nstands x Nfreqs arrays.
+    """
+    
+    freq = aa.get_afreqs()
+    
+    cblDelay = numpy.empty((len(stands), freq.size), dtype=numpy.float64)
+    cblGain = numpy.empty((len(stands), freq.size), dtype=numpy.float64)
+    for j,std in enumerate(stands):
+        ## Cable delay
+        delayAt1MHz = std.cable.delay(frequency=1.0e6) * 1e9 # s -> ns
+        cblDelay[j,:] = std.cable.delay(frequency=freq*1e9) * 1e9 # s -> ns
+        ## NB: Replace the cable delays below 1 MHz with the 1 MHz value to keep the 
+        ## delays from blowing up for small f
+        cblDelay[j,:] = numpy.where( freq >= 0.001, cblDelay[j,:], delayAt1MHz )
+        
+        ## Cable gain
+        cblGain[j,:] = std.cable.gain(frequency=freq*1e9)
+        
+    return cblDelay, cblGain
+
+
+def _build_signals(aa, stands, src_params, times, cable_params=None):
     """
     Given an aipy AntennaArray, a list of stand numbers, a dictionary of source 
     parameters, and an array of times in ns, return a numpy array of the simulated 
-    signals that is Nstands x Ntimes in shape
-    ."""
+    signals that is Nstands x Ntimes in shape.  The optional `cable_params` 
+    keyword accepts the output of _get_cable_parameters so that the cable 
+    delays and gains do not need to be recomputed on every call.
+    """
 
     # Find out how many stands, srcs, and samples (times) we are working with
     Nstand = len(aa.ants)
     Ntime = len(times)
     
-    # Setup a temporary array to hold the signals per stand and time.
-    # This array is complex so that it can accommidate TBN data
-    temp = numpy.zeros((Nstand, Ntime), dtype=numpy.complex128)
+    # Load in the cable delays and gains
+    if cable_params is None:
+        cable_params = _get_cable_parameters(aa, stands)
+    cblDelay, cblGain = cable_params
+    
+    # Create array of stand positions for geometric delay calculations
+    xyz = numpy.array([[std.stand.x, std.stand.y, std.stand.z] for std in stands])
+    
+    # Setup a temporary array to hold the signals per stand and frequency.
+    # The inverse FFT is linear so the sources can be summed in the frequency
+    # domain and then transformed to Nstands x Ntimes all at once at the end
+    spec = numpy.zeros((Nstand, Ntime), dtype=numpy.complex128)
 
     # Loop over sources and stands to build up the signals
     for topo,trans,flux,freq in zip(src_params['topo'], src_params['trans'], src_params['flux'], src_params['freq']):
         # Random Guassian noise for seeding this source
         rv_samp = numpy.random.randn(2*freq.size).view(numpy.complex128)
         
+        # Gather the beam response for all of the stands
+        antResponse = numpy.empty((Nstand, freq.size), dtype=numpy.float64)
+        beamResponses = {}
         for j,(ant,std) in enumerate(zip(aa.ants, stands)):
-            ## Zeroth, get the beam response in the direction of the current source for all frequencies
-            antResponse = numpy.squeeze( ant.bm_response(topo, pol='x' if std.pol == 0 else 'y') )
-            ## Create array of stand position for geometric delay calculations
-            xyz = numpy.array([std.stand.x, std.stand.y, std.stand.z])
-
-            ## First, do the geometric delay
-            geoDelay = numpy.dot(topo, xyz) / speedOfLight * 1e9 # s -> ns 
-            
-            ## Second, do the cable delay
-            delayAt1MHz = std.cable.delay(frequency=1.0e6) * 1e9 # s -> ns
-            cblDelay = std.cable.delay(frequency=aa.get_afreqs()*1e9) * 1e9 # s -> ns
-            ## NB: Replace the cable delays below 1 MHz with the 1 MHz value to keep the 
-            ## delays from blowing up for small f
-            cblDelay = numpy.where( freq >= 0.001, cblDelay, delayAt1MHz )
-            
-            ##Finally, load the cable gain
-            cblGain = std.cable.gain(frequency=aa.get_afreqs()*1e9)
-            
-            ## Put it all together
-            factor = numpy.sqrt(antResponse * cblGain * flux / 2) * rv_samp
-            temp[j,:] += numpy.fft.ifft(factor * numpy.exp(-2j*numpy.pi*freq*(cblDelay - geoDelay)))
-            
-    # Scale temp to sqrt of the FFT-Length
-    temp /= numpy.sqrt(freq.size)
+            ## Get the beam response in the direction of the current source for all frequencies
+            ## NB: This only needs to be computed once per polarization for 
+            ## antennas that share the same beam model and pointing
+            pol = 'x' if std.pol == 0 else 'y'
+            beamKey = (id(ant.beam), ant.rot_pol_x.tobytes(), ant.rot_pol_y.tobytes(), pol)
+            try:
+                antResponse[j,:] = beamResponses[beamKey]
+            except KeyError:
+                beamResponses[beamKey] = numpy.squeeze( ant.bm_response(topo, pol=pol) )
+                antResponse[j,:] = beamResponses[beamKey]
+                
+        # Compute the geometric delays for all of the stands at once
+        geoDelay = numpy.dot(xyz, topo).reshape(-1, 1) / speedOfLight * 1e9 # s -> ns
+        
+        # Put it all together with a single complex exponential for all stands.
+        # This is done in blocks of stands so that the temporary arrays stay 
+        # in cache
+        omega = -2j*numpy.pi*freq
+        for j in range(0, Nstand, 32):
+            k = j + 32
+            phasor = numpy.exp(omega*(cblDelay[j:k,:] - geoDelay[j:k,:]))
+            phasor *= numpy.sqrt(antResponse[j:k,:] * cblGain[j:k,:] * flux / 2) * rv_samp
+            spec[j:k,:] += phasor
+        
+    # Move to the time domain and scale temp to sqrt of the FFT-Length
+    temp = numpy.fft.ifft(spec, axis=1)
+    temp /= numpy.sqrt(spec.shape[1])
     
     # Done
     return temp
@@ -291,35 +429,56 @@ def _point_source_tbn(fh, stands, src, nframes, **kwargs):
     freqs = (numpy.fft.fftfreq(samplesPerFrame, d=1.0/sample_rate)) + central_freq
     aa = _get_antennaarray(kwargs['station'], stands, start_time, freqs)
     
+    # Get the cable delays and gains - these do not change from frame to frame
+    cable_params = _get_cable_parameters(aa, stands)
+    
+    # How often to update the source positions and fluxes in seconds.  The 
+    # sources barely move over the course of a single frame so there is no 
+    # need to recompute them for every one
+    srcUpdateInterval = 1.0
+    srcUpdateTime = None
+    
     if verbose:
         print("Simulating %i frames of TBN Data @ %.2f kHz for %i stands:" % \
             (nframes, sample_rate/1e3, len(stands)))
     
+    # Time tag of the first frame and the number of ticks between frames
+    t0 = int(start_time*dp_common.fS)
+    tStep = dp_common.fS*samplesPerFrame/sample_rate
+    
+    # Setup the raw frames for all stands once and then update them as we go.
+    # NB:  Stand/pol labels in the TBN data are based on the digitizer not
+    # the stand
+    frames = [tbn.SimFrame(stand=(stand.digitizer - 1) // 2 + 1, pol=(stand.digitizer - 1) % 2, central_freq=central_freq, gain=19) for stand in stands]
+    rawFrames = _get_raw_frames(frames, samplesPerFrame, t0)
+    
     for i in range(nframes):
         if i % 1000 == 0 and verbose:
             print(" frame %i" % (i+1))
-        t = int(start_time*dp_common.fS) + int(i*dp_common.fS*samplesPerFrame/sample_rate)
+        t = t0 + int(i*tStep)
         tFrame = t/dp_common.fS - start_time + numpy.arange(samplesPerFrame, dtype=numpy.float32) / sample_rate
         
-        # Get the source parameters
-        src_params = _get_source_parameters(aa, t/dp_common.fS, src)
+        # Get the source parameters, if they need to be updated
+        if srcUpdateTime is None or t/dp_common.fS - srcUpdateTime >= srcUpdateInterval:
+            src_params = _get_source_parameters(aa, t/dp_common.fS, src)
+            srcUpdateTime = t/dp_common.fS
         
         # Generate the time series response of each signal at each frequency
-        tdSignals = _build_signals(aa, stands, src_params, tFrame*1e9)
+        tdSignals = _build_signals(aa, stands, src_params, tFrame*1e9, cable_params=cable_params)
+        
+        # Add in the noise for all stands at once - the noise draws are in 
+        # the same order as they would be if they were done one stand at a
+        # time
+        noise = numpy.random.randn(len(stands), 2, samplesPerFrame)
+        data = (noise[:,0,:] + 1j*noise[:,1,:]).astype(numpy.singlecomplex)
+        data *= maxValue*noise_strength
+        tdSignals = tdSignals.astype(numpy.singlecomplex)
+        tdSignals *= maxValue
+        data += tdSignals
+        data = _quantize(data, 8)
         
-        for j,stand in enumerate(stands):
-            ## NB:  Stand/pol labels in the TBN data are based on the digitizer not
-            ## the stand
-            stand_id = (stand.digitizer - 1) // 2 + 1
-            pol_id = (stand.digitizer - 1) % 2
-            
-            cFrame = tbn.SimFrame(stand=stand_id, pol=pol_id, central_freq=central_freq, gain=19, frame_count=i+1, obs_time=t)
-            cFrame.data = numpy.zeros(samplesPerFrame, dtype=numpy.singlecomplex)
-            cFrame.data += numpy.random.randn(samplesPerFrame) + 1j*numpy.random.randn(samplesPerFrame)
-            cFrame.data *= maxValue*noise_strength
-            cFrame.data += maxValue*tdSignals[j,:].astype(numpy.singlecomplex)
-            
-            cFrame.write_raw_frame(fh)
+        _update_tbn_frames(rawFrames, i+1, t, data)
+        rawFrames.tofile(fh)
 
 
 def point_source(fh, stands, src, nframes, station=lwa_common.lwa1, mode='TBN', central_freq=49.0e6, filter=7, gain=20, start_time=0, noise_strength=0.1, verbose=False):
@@ -76,21 +76,17 @@ def frame_to_frame(drx_frame):
     rawFrame[31] = drx_frame.payload.flags & 255
     ## Data
     if drx_frame.payload.data.dtype == CI8:
-        i = drx_frame.payload.data['re'].copy()
-        q = drx_frame.payload.data['im'].copy()
+        i = drx_frame.payload.data['re']
+        q = drx_frame.payload.data['im']
     else:
-        i = drx_frame.payload.data.real
-        q = drx_frame.payload.data.imag
-        ### Round, clip, and convert to unsigned integers
-        i = i.round()
-        i = i.clip(-8, 7)
-        i = i.astype(numpy.int8)
-        q = q.round()
-        q = q.clip(-8, 7)
-        q = q.astype(numpy.int8)
-    i += ((i & 8) << 1)
-    q += ((q & 8) << 1)
-    
+        ### Round, clip, and convert to signed integers
+        iq = numpy.empty((2,)+drx_frame.payload.data.shape, dtype=drx_frame.payload.data.real.dtype)
+        numpy.rint(drx_frame.payload.data.real, out=iq[0])
+        numpy.rint(drx_frame.payload.data.imag, out=iq[1])
+        numpy.clip(iq, -8, 7, out=iq)
+        i, q = iq.astype(numpy.int8)
+        
+    ### Pack the 4-bit two's complement values
     rawFrame[32:] = (((i &  0xF) << 4) | (q & 0xF))
     
     return rawFrame
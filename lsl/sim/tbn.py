@@ -9,6 +9,7 @@ import sys
 if sys.version_info < (3,):
     range = xrange
     
+import struct
 import numpy
 
 from lsl.common.dp import fS
@@ -29,55 +30,28 @@ def frame_to_frame(tbn_frame):
     """
 
     # The raw frame
-    rawFrame = numpy.zeros(tbn.FRAME_SIZE, dtype=numpy.uint8)
-
-    # Part 1: The header
-    ## Sync. words (0xDEC0DE5C)
-    rawFrame[0] = 0xDE  # 222
-    rawFrame[1] = 0xC0  # 192
-    rawFrame[2] = 0xDE  # 222
-    rawFrame[3] = 0x5C  #  92
-    ## Frame count
-    rawFrame[5] = (tbn_frame.header.frame_count>>16) & 255
-    rawFrame[6] = (tbn_frame.header.frame_count>>8) & 255
-    rawFrame[7] = tbn_frame.header.frame_count & 255
-    ## Tuning word
-    rawFrame[8] = (tbn_frame.header.tuning_word>>24) & 255
-    rawFrame[9] = (tbn_frame.header.tuning_word>>16) & 255
-    rawFrame[10] = (tbn_frame.header.tuning_word>>8) & 255
-    rawFrame[11] = tbn_frame.header.tuning_word & 255
-    ## TBN ID
-    rawFrame[12] = (tbn_frame.header.tbn_id>>8) & 255
-    rawFrame[13] = tbn_frame.header.tbn_id & 255
-    ## Gain
-    rawFrame[14] = (tbn_frame.header.gain>>8) & 255
-    rawFrame[15] = tbn_frame.header.gain & 255
+    rawFrame = numpy.empty(tbn.FRAME_SIZE, dtype=numpy.uint8)
     
-    # Part 2: The data
-    ## Time tag
-    rawFrame[16] = (tbn_frame.payload.timetag>>56) & 255
-    rawFrame[17] = (tbn_frame.payload.timetag>>48) & 255
-    rawFrame[18] = (tbn_frame.payload.timetag>>40) & 255
-    rawFrame[19] = (tbn_frame.payload.timetag>>32) & 255
-    rawFrame[20] = (tbn_frame.payload.timetag>>24) & 255
-    rawFrame[21] = (tbn_frame.payload.timetag>>16) & 255
-    rawFrame[22] = (tbn_frame.payload.timetag>>8) & 255
-    rawFrame[23] = tbn_frame.payload.timetag & 255
+    # Part 1: The header - sync. word (0xDEC0DE5C), frame count, tuning word, 
+    # TBN ID, and gain
+    # Part 2: The data - time tag and I/Q samples
+    ## Header and time tag
+    rawFrame[:24] = numpy.frombuffer(struct.pack('>IIIHHQ', 0xDEC0DE5C, 
+                                                 int(tbn_frame.header.frame_count) & 0xFFFFFF, 
+                                                 int(tbn_frame.header.tuning_word) & 0xFFFFFFFF, 
+                                                 int(tbn_frame.header.tbn_id) & 0xFFFF, 
+                                                 int(tbn_frame.header.gain) & 0xFFFF, 
+                                                 int(tbn_frame.payload.timetag) & 0xFFFFFFFFFFFFFFFF), 
+                                     dtype=numpy.uint8)
     ## Data
+    iq = rawFrame[24:].view(numpy.int8)
     if tbn_frame.payload.data.dtype == CI8:
-        iq = tbn_frame.payload.data.view(numpy.int8).ravel().copy()
+        iq[:] = tbn_frame.payload.data.view(numpy.int8).ravel()
     else:
-        iq = tbn_frame.payload.data
-        iq.real
-        ### Round and convert to unsigned integers
-        iq = numpy.round(iq)
-        if iq.dtype == numpy.complex128:
-            iq = iq.astype(numpy.complex64)
-        iq = iq.view(numpy.float32)
-        iq = iq.astype(numpy.int8)
+        ### Round and convert to signed integers directly into the frame
+        numpy.rint(tbn_frame.payload.data.real, out=iq[0::2], casting='unsafe')
+        numpy.rint(tbn_frame.payload.data.imag, out=iq[1::2], casting='unsafe')
         
-    rawFrame[24:] = iq
-    
     return rawFrame
 
 
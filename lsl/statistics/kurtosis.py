@@ -49,26 +49,33 @@ def var(M, N=1):
     """
     Return the expected variance (second central moment) of the spectral kurtosis 
     for M points each composed of N measurements.
+    
+    .. versionchanged:: 3.0.0
+        M and N can now be numpy.ndarray instances
     """
 
-    return 2.0*N*(N+1)*M**2/ float( (M-1)*(M*N+3)*(M*N+2) )
+    return 2.0*N*(N+1)*M**2/ ( (M-1.0)*(M*N+3.0)*(M*N+2.0) )
 
 
 def skew(M, N=1):
     """
     Return the expected skewness (third central moment) of the spectral kurtosis 
     for M points each composed of N measurements.
+    
+    .. versionchanged:: 3.0.0
+        M and N can now be numpy.ndarray instances
     """
     
     m2 = var(M, N)
     
-    return 4.0*m2*M / float( (M-1)*(M*N+5)*(M*N+4) ) * ( (N+4)*M*N - 5*N - 2 )
+    return 4.0*m2*M / ( (M-1.0)*(M*N+5.0)*(M*N+4.0) ) * ( (N+4)*M*N - 5*N - 2 )
 
 
-def _alpha(M, N):
+def _pearson_parameters(M, N):
     """
-    Determine the value of alpha needed to reproduce the spectral kurtosis PDF via a
-    Pearson Type VI distribution (betaprime in scipy.stats world).  
+    Determine the values of alpha, beta, and delta needed to reproduce the 
+    spectral kurtosis PDF via a shifted Pearson Type VI distribution (betaprime 
+    in scipy.stats world).  The values are returned as a three-element tuple.
     
     .. note::
         This corresponds to Equation (14) in Nita & Gary (2010, MNRAS 406, L60)
@@ -76,8 +83,27 @@ def _alpha(M, N):
     
     m2 = var(M, N)
     m3 = skew(M, N)
+    
+    # Common terms
+    root = numpy.sqrt( 16*m2**4 + 4*m3**2*m2 + m3**2 )
+    
+    a = 1.0/m3**3*(32*m2**5 - 4*m3*m2**3 + 8*m3**2*m2**2 + m3**2*m2 - m3**3 + (8*m2**3 - m3*m2 + m3**2)*root)
+    b = 3 + 2*m2/m3**2*(4*m2**2 + root)
+    d = (b - a - 1) / (b - 1)
+    
+    return a, b, d
 
-    return 1.0/m3**3*(32*m2**5 - 4*m3*m2**3 + 8*m3**2*m2**2 + m3**2*m2 - m3**3 + (8*m2**3 - m3*m2 + m3**2)*numpy.sqrt( 16*m2**4 + 4*m3**2*m2 + m3**2 ))
+
+def _alpha(M, N):
+    """
+    Determine the value of alpha needed to reproduce the spectral kurtosis PDF via a
+    Pearson Type VI distribution (betaprime in scipy.stats world).  
+    
+    .. note::
+        This corresponds to Equation (14) in Nita & Gary (2010, MNRAS 406, L60)
+    """
+    
+    return _pearson_parameters(M, N)[0]
 
 
 def _beta(M, N):
@@ -89,10 +115,7 @@ def _beta(M, N):
         This corresponds to Equation (14) in Nita & Gary (2010, MNRAS 406, L60)
     """
     
-    m2 = var(M, N)
-    m3 = skew(M, N)
-
-    return 3 + 2*m2/m3**2*(4*m2**2 + numpy.sqrt( 16*m2**4 + 4*m3**2*m2 + m3**2 ))
+    return _pearson_parameters(M, N)[1]
 
 
 def _delta(M, N):
@@ -101,10 +124,34 @@ def _delta(M, N):
     in scipy.stats world) to a mean value of 1.0
     """
     
-    a = _alpha(M, N)
-    b = _beta(M, N)
+    return _pearson_parameters(M, N)[2]
+
 
-    return (b - a - 1) / (b - 1)
+def _get_limit(q, a, b, d, fallback):
+    """
+    Evaluate the percent point function of a Pearson Type VI distribution
+    (betaprime in scipy.stats world) at q.  Any values that cannot be computed
+    because of a floating point error are replaced with the corresponding 
+    value in fallback.
+    """
+    
+    # Try to get everything at once
+    try:
+        return betaprime.ppf(q, a, b, loc=d)
+    except FloatingPointError:
+        if numpy.ndim(a) == 0:
+            return fallback
+            
+    # Something was wrong so work through the values one at a time, giving up
+    # on the ones where we hit an overflow error
+    a, b, d, fallback = numpy.broadcast_arrays(a, b, d, fallback)
+    limit = numpy.empty(a.shape, dtype=numpy.float64)
+    for i in numpy.ndindex(*a.shape):
+        try:
+            limit[i] = betaprime.ppf(q, a[i], b[i], loc=d[i])
+        except FloatingPointError:
+            limit[i] = fallback[i]
+    return limit
 
 
 def get_limits(sigma, M, N=1):
@@ -115,37 +162,25 @@ def get_limits(sigma, M, N=1):
     
     .. note::
         This corresponds to Section 3.1 in Nita & Gary (2010, MNRAS 406, L60)
+        
+    .. versionchanged:: 3.0.0
+        M and N can now be numpy.ndarray instances, in which case the limits
+        are also numpy.ndarray instances
     """
     
     # Adjust the NumPy error levels so that we know when ppf() may be suspect
-    errLevels = numpy.geterr()
-    numpy.seterr(all='raise')
-    
-    # Convert the sigma to a fraction for the high and low clip levels
-    percentClip = ( 1.0 - erf(sigma/numpy.sqrt(2)) ) / 2.0
-    
-    # Build the Pearson type VI distribution function - parameters then instance
-    a = _alpha(M, N)
-    b = _beta(M, N)
-    d = _delta(M, N)
-    
-    rv = betaprime(a, b, loc=d)
-    
-    # Try to get a realistic lower limit, giving up if we hit an overflow error
-    try:
-        lower = rv.ppf(percentClip)
-    except FloatingPointError:
-        lower = mean(M, N) - sigma*std(M, N)
+    with numpy.errstate(all='raise'):
+        # Convert the sigma to a fraction for the high and low clip levels
+        percentClip = ( 1.0 - erf(sigma/numpy.sqrt(2)) ) / 2.0
         
-    # Try to get a realistic upper limit, giving up if we hit an overflow error
-    try:
-        upper = rv.ppf(1.0-percentClip)
-    except FloatingPointError:
-        upper = mean(M, N) + sigma*std(M, N)
+        # Build the Pearson type VI distribution function parameters
+        a, b, d = _pearson_parameters(M, N)
+        
+        # Try to get realistic limits, falling back to the Gaussian limits if we
+        # hit an overflow error
+        lower = _get_limit(percentClip, a, b, d, mean(M, N) - sigma*std(M, N))
+        upper = _get_limit(1.0-percentClip, a, b, d, mean(M, N) + sigma*std(M, N))
         
-    # Restore the NumPy error levels
-    numpy.seterr(**errLevels)
-    
     return lower, upper
 
 
@@ -157,7 +192,13 @@ def spectral_fft(x, axis=None):
     """
     
     # Convert to power
-    xPrime = numpy.abs(x)**2
+    x = numpy.asarray(x)
+    if numpy.iscomplexobj(x):
+        ## NB: This avoids the square root/square round trip of numpy.abs(x)**2
+        xPrime = x.real**2
+        xPrime += x.imag**2
+    else:
+        xPrime = x**2
     return spectral_power(xPrime, N=1, axis=axis)
 
 
@@ -166,11 +207,28 @@ def spectral_power(x, N=1, axis=None):
     Compute the spectral kurtosis for a set of power measurements averaged over 
     N FFT windows.  For a distribution consistent with Gaussian noise, this value 
     should be ~1.
+    
+    .. versionchanged:: 3.0.0
+        The number of points M is now taken from the axis that is being 
+        summed over, or the total number of points if axis is None
     """
     
-    M = len(x)
+    # Move the axis of interest to the end
+    x = numpy.asarray(x)
+    if axis is None:
+        x = x.ravel()
+    else:
+        x = numpy.moveaxis(x, axis, -1)
+    M = x.shape[-1]
+    
+    # Sum of the values and of the values squared - the latter is done with
+    # einsum so that there is no x**2 temporary array
+    ## NB: einsum accumulates in the dtype it is given so make sure that is
+    ##     at least float64 to avoid integer overflow and float32 round off
+    s1 = x.sum(axis=-1)
+    s2 = numpy.einsum('...i,...i->...', x, x, dtype=numpy.promote_types(x.dtype, numpy.float64))
     
-    k = M*(x**2).sum(axis=axis)/(x.sum(axis=axis))**2 - 1.0
+    k = M*s2/s1**2 - 1.0
     k *= (M*N+1)/(M-1)
     
     return k
@@ -99,6 +99,40 @@ def biweight_mean(inputData, axis=None, dtype=None):
     return y0
 
 
+def __mean_last_axis(data, cut=3.0):
+    """
+    Vectorized version of mean() that works along the last axis of a 
+    numpy.ndarray.
+    """
+    
+    data0 = numpy.median(data, axis=-1, keepdims=True)
+    absDev = numpy.abs(data-data0)
+    maxAbsDev = numpy.median(absDev, axis=-1, keepdims=True) / 0.6745
+    maxAbsDev = numpy.where(maxAbsDev < __epsilon, absDev.mean(axis=-1, keepdims=True) / 0.8000, maxAbsDev)
+    
+    cutOff = cut*maxAbsDev
+    good = absDev <= cutOff
+    nGood = good.sum(axis=-1, keepdims=True)
+    dataMean = numpy.where(good, data, 0).sum(axis=-1, keepdims=True) / nGood
+    dataSigma = numpy.sqrt(numpy.where(good, (data-dataMean)**2.0, 0).sum(axis=-1, keepdims=True) / nGood)
+    
+    if cut > 1.0:
+        sigmacut = cut
+    else:
+        sigmacut = 1.0
+    if sigmacut <= 4.5:
+        dataSigma = dataSigma / (-0.15405 + 0.90723*sigmacut - 0.23584*sigmacut**2.0 + 0.020142*sigmacut**3.0)
+        
+    cutOff = cut*dataSigma
+    good = absDev <= cutOff
+    nGood = good.sum(axis=-1)
+    if (nGood <= 3).any():
+        raise ValueError("Distribution is too strange to compute mean")
+    dataMean = numpy.where(good, data, 0).sum(axis=-1) / nGood
+    
+    return dataMean
+
+
 def mean(inputData, cut=3.0, axis=None, dtype=None):
     """
     Robust estimator of the mean of a data set.  Based on the 
@@ -110,11 +144,21 @@ def mean(inputData, cut=3.0, axis=None, dtype=None):
     .. versionchanged:: 1.0.3
         Added the 'axis' and 'dtype' keywords to make this function more
         compatible with numpy.mean()
+        
+    .. versionchanged:: 3.0.0
+        Vectorized the calculation when 'axis' is given for data that are
+        not masked arrays
     """
     
     if axis is not None:
-        fnc = lambda x: mean(x, cut=cut, dtype=dtype)
-        dataMean = numpy.apply_along_axis(fnc, axis, inputData)
+        if type(inputData).__name__ == "MaskedArray":
+            fnc = lambda x: mean(x, cut=cut, dtype=dtype)
+            dataMean = numpy.apply_along_axis(fnc, axis, inputData)
+        else:
+            data = numpy.moveaxis(numpy.asarray(inputData), axis, -1)
+            if dtype is not None:
+                data = data.astype(dtype)
+            dataMean = __mean_last_axis(data, cut=cut)
     else:
         data = inputData.ravel()
         if type(data).__name__ == "MaskedArray":
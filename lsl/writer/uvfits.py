@@ -14,8 +14,8 @@ if sys.version_info < (3,):
     range = xrange
     
 import os
-import gc
 import math
+import tempfile
 import ephem
 import numpy
 from astropy.time import Time as AstroTime
@@ -25,6 +25,7 @@ from datetime import datetime
 
 from lsl import astro
 from lsl.writer.fitsidi import WriterBase
+from lsl.misc.lru_cache import lru_cache
 
 from lsl.misc import telemetry
 telemetry.track_module()
@@ -50,6 +51,20 @@ def merge_baseline(ant1, ant2, shift=None):
     return baseline
 
 
+def _merge_baselines(ant1, ant2):
+    """
+    Private function to merge two arrays of stand ID numbers into an array of 
+    baselines using the same packing as merge_baseline.
+    """
+    
+    ant1 = numpy.asarray(ant1, dtype=numpy.int64)
+    ant2 = numpy.asarray(ant2, dtype=numpy.int64)
+    
+    return numpy.where(numpy.maximum(ant1, ant2) > 255,
+                       ant1*2048 + ant2 + 65536,
+                       ant1*256 + ant2)
+
+
 def split_baseline(baseline, shift=None):
     """
     Given a baseline, split it into it consistent stand ID numbers.
@@ -65,6 +80,30 @@ def split_baseline(baseline, shift=None):
     return ant1,ant2
 
 
+@lru_cache(maxsize=128)
+def _get_eop(mjd):
+    """
+    Private function to look up the Earth orientation parameters for the 
+    given UTC MJD.  Returns a three-element tuple of UT1 - UTC in seconds and
+    the x and y polar motion in arcsec.
+    """
+    
+    eop = iers.IERS_Auto.open()
+    refAT = AstroTime(mjd, format='mjd', scale='utc')
+    try:
+        # Temporary fix for maia.usno.navy.mil being down
+        ut1_utc = eop.ut1_utc(refAT)
+        pm_xy = eop.pm_xy(refAT)
+    except iers.IERSRangeError:
+        eop.close()
+        with iers.Conf().set_temp('iers_auto_url', 'ftp://cddis.gsfc.nasa.gov/pub/products/iers/finals2000A.all'):
+            eop = iers.IERS_Auto.open()
+            ut1_utc = eop.ut1_utc(refAT)
+            pm_xy = eop.pm_xy(refAT)
+            
+    return ut1_utc.to('s').value, pm_xy[0].to('arcsec').value, pm_xy[1].to('arcsec').value
+
+
 class Uv(WriterBase):
     """
     Class for storing visibility data and writing the data, along with array
@@ -72,6 +111,10 @@ class Uv(WriterBase):
     AIPS via the UVLOD task.
     """
     
+    # Size in bytes above which the visibility data are staged in a temporary,
+    # memory mapped file while the primary HDU is built
+    _MAX_VIS_IN_MEMORY = 1024**3
+    
     def __init__(self, filename, ref_time=0.0, verbose=False, memmap=None, overwrite=False):
         """
         Initialize a new UVFITS object using a filename and a reference time
@@ -87,6 +130,11 @@ class Uv(WriterBase):
         # File-specific information
         WriterBase.__init__(self, filename, ref_time=ref_time, verbose=verbose)
         
+        # Caches for the per-integration times and zenith positions that are 
+        # shared between the tables
+        self._time_cache = {}
+        self._zenith_cache = {}
+        
         # Open the file and get going
         if os.path.exists(filename):
             if overwrite:
@@ -113,21 +161,12 @@ class Uv(WriterBase):
         # Update the observatory-specific information
         self.siteName = site.name
         
-        stands = []
-        for ant in antennas:
-            stands.append(ant.stand.id)
-        stands = numpy.array(stands)
+        stands = numpy.array([ant.stand.id for ant in antennas])
         
         arrayX, arrayY, arrayZ = site.geocentric_location
         
-        xyz = numpy.zeros((len(stands),3))
-        i = 0
-        for ant in antennas:
-            xyz[i,0] = ant.stand.x
-            xyz[i,1] = ant.stand.y
-            xyz[i,2] = ant.stand.z
-            i += 1
-            
+        xyz = numpy.array([(ant.stand.x, ant.stand.y, ant.stand.z) for ant in antennas], dtype=numpy.float64)
+        
         # Create the stand mapper
         mapper = {}
         if stands.max() > 2047:
@@ -137,9 +176,9 @@ class Uv(WriterBase):
             
         ants = []
         topo2eci = site.eci_transform_matrix
+        eci = numpy.dot(xyz, topo2eci.T)
         for i in range(len(stands)):
-            eci = numpy.dot(topo2eci, xyz[i,:])
-            ants.append( self._Antenna(stands[i], eci[0], eci[1], eci[2], bits=bits) )
+            ants.append( self._Antenna(stands[i], eci[i,0], eci[i,1], eci[i,2], bits=bits) )
             if enableMapper:
                 mapper[stands[i]] = i+1
             else:
@@ -152,8 +191,12 @@ class Uv(WriterBase):
                 value = mapper[key]
                 print("UVFITS:  stand #%i -> mapped #%i" % (key, value))
                 
+        # Also store the mapper as a lookup table indexed by stand ID
+        mapperLUT = numpy.full(stands.max()+1, -1, dtype=numpy.int32)
+        mapperLUT[list(mapper.keys())] = list(mapper.values())
+        
         self.nAnt = len(ants)
-        self.array.append( {'center': [arrayX, arrayY, arrayZ], 'ants': ants, 'mapper': mapper, 'enableMapper': enableMapper, 'inputAnts': antennas} )
+        self.array.append( {'center': [arrayX, arrayY, arrayZ], 'ants': ants, 'mapper': mapper, 'mapperLUT': mapperLUT, 'enableMapper': enableMapper, 'inputAnts': antennas} )
         
     def add_comment(self, comment):
         """
@@ -183,6 +226,11 @@ class Uv(WriterBase):
         """
         Fill in the UVFITS file will all of the tables in the
         correct order.
+        
+        .. versionchanged:: 3.0.0
+            No longer runs the garbage collector after the data have been
+            written.  Call gc.collect() directly if the memory is needed
+            back right away.
         """
         
         # Validate
@@ -200,16 +248,27 @@ class Uv(WriterBase):
         # Sort the data set
         self.data.sort()
         
-        self._write_aipssu_hdu(dummy=True)
-        self._write_primary_hdu()
-        self._write_aipsan_hdu()
-        self._write_aipsfq_hdu()
-        self._write_aipssu_hdu()
-        self._write_aipsbp_hdu()
-        
+        try:
+            self._write_aipssu_hdu(dummy=True)
+            self._write_primary_hdu()
+            self._write_aipsan_hdu()
+            self._write_aipsfq_hdu()
+            self._write_aipssu_hdu()
+            self._write_aipsbp_hdu()
+            self.FITS.flush()
+        finally:
+            # Clear out the temporary tables and caches so that they are 
+            # rebuilt on the next call to write(), even if this one failed
+            for attr in ('an', 'am', '_sourceTable'):
+                try:
+                    delattr(self, attr)
+                except AttributeError:
+                    pass
+            self._time_cache.clear()
+            self._zenith_cache.clear()
+            
         # Clear out the data section
         del(self.data[:])
-        gc.collect()
         
     def close(self):
         """
@@ -236,6 +295,62 @@ class Uv(WriterBase):
         hdr['ARRNAM'] = self.siteName
         hdr['RDATE'] = (self.ref_time, 'file data reference date')
         
+    def _get_time_info(self, obsTime):
+        """
+        Given a TAI MJD observation time, return a two-element tuple of the 
+        UTC JD and the UTC JD at 0 hours on that day.
+        """
+        
+        try:
+            utc, utc0 = self._time_cache[obsTime]
+        except KeyError:
+            utc = astro.taimjd_to_utcjd(obsTime)
+            ## JD days start at noon so 0 hours UTC is always at a half day
+            utc0 = math.floor(utc - 0.5) + 0.5
+            self._time_cache[obsTime] = (utc, utc0)
+            
+        return utc, utc0
+        
+    def _get_zenith_info(self, obsTime, obs):
+        """
+        Given a TAI MJD observation time and an ephem.Observer instance set
+        to that time, return a two-element tuple of the apparent equatorial
+        coordinates of zenith and the 'ZA' source name for that time.
+        """
+        
+        try:
+            equ, name = self._zenith_cache[obsTime]
+        except KeyError:
+            equ = astro.equ_posn( obs.sidereal_time()*180/numpy.pi, obs.lat*180/numpy.pi )
+            
+            # format 'source' name based on local sidereal time
+            raHms = astro.deg_to_hms(equ.ra)
+            (tsecs, secs) = math.modf(raHms.seconds)
+            name = "ZA%02d%02d%02d%01d" % (raHms.hours, raHms.minutes, int(secs), int(tsecs * 10.0))
+            self._zenith_cache[obsTime] = (equ, name)
+            
+        return equ, name
+        
+    def _map_stands(self, stands):
+        """
+        Given an array of stand ID numbers, return the corresponding array of
+        mapped stand ID numbers.  If the stand mapper is enabled and any of 
+        the stands are not part of the array geometry a ValueError is raised.
+        """
+        
+        if not self.array[0]['enableMapper']:
+            return stands
+            
+        mapperLUT = self.array[0]['mapperLUT']
+        mapped = numpy.full(stands.shape, -1, dtype=mapperLUT.dtype)
+        valid = (stands >= 0) & (stands < mapperLUT.size)
+        mapped[valid] = mapperLUT[stands[valid]]
+        if (mapped < 0).any():
+            missing = numpy.unique(stands[mapped < 0])
+            raise ValueError("Stand(s) %s are not part of the array geometry" % ', '.join([str(m) for m in missing]))
+            
+        return mapped
+        
     def _write_primary_hdu(self):
         """
         Write the primary HDU to file.
@@ -253,23 +368,41 @@ class Uv(WriterBase):
         obs.elev = arrPos.elv * numpy.pi/180
         obs.pressure = 0
         
+        # Figure out how many rows are in the UV data so that the random 
+        # parameters and visibilities can be filled in as we go
+        nRow = sum([len(dataSet.baselines) for dataSet in self.data if dataSet.pol == self.stokes[0]])
+        uData = numpy.empty(nRow, dtype=numpy.float32)
+        vData = numpy.empty(nRow, dtype=numpy.float32)
+        wData = numpy.empty(nRow, dtype=numpy.float32)
+        dateData = numpy.empty(nRow, dtype=numpy.float64)
+        timeData = numpy.empty(nRow, dtype=numpy.float64)
+        intTimeData = numpy.empty(nRow, dtype=numpy.float64)
+        blineData = numpy.empty(nRow, dtype=numpy.int64)
+        sourceData = numpy.empty(nRow, dtype=numpy.int64)
+        visShape = (nRow, 1, 1, self.nChan, self.nStokes, 2)
+        if nRow*self.nChan*self.nStokes*2*4 > self._MAX_VIS_IN_MEMORY:
+            ## Large data sets are staged in a temporary file next to the output
+            visFile = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(self.filename)))
+            visData = numpy.memmap(visFile, dtype=numpy.float32, mode='w+', shape=visShape)
+        else:
+            visFile = None
+            visData = numpy.empty(visShape, dtype=numpy.float32)
+        
+        # Build a lookup table for the source IDs
+        sourceIDs = {}
+        for i,srcName in enumerate(self._sourceTable):
+            sourceIDs.setdefault(srcName, i+1)
+            
         first = True
-        mList = []
-        uList = []
-        vList = []
-        wList = []
-        timeList = []
-        dateList = []
-        intTimeList = []
-        blineList = []
-        nameList = []
-        sourceList = []
+        row = 0
         for dataSet in self.data:
             # Sort the data by packed baseline
             try:
                 if len(dataSet.visibilities) != len(order):
                     raise NameError
             except NameError:
+                stand1 = self._map_stands(numpy.array([antenna1.stand.id for antenna1,antenna2 in dataSet.baselines]))
+                stand2 = self._map_stands(numpy.array([antenna2.stand.id for antenna1,antenna2 in dataSet.baselines]))
                 order = dataSet.argsort(mapper=mapper)
                 try:
                     del baselineMapped
@@ -279,12 +412,7 @@ class Uv(WriterBase):
             # Deal with defininig the values of the new data set
             if dataSet.pol == self.stokes[0]:
                 ## Figure out the new date/time for the observation
-                utc = astro.taimjd_to_utcjd(dataSet.obsTime)
-                date = astro.get_date(utc)
-                date.hours = 0
-                date.minutes = 0
-                date.seconds = 0
-                utc0 = date.to_jd()
+                utc, utc0 = self._get_time_info(dataSet.obsTime)
                 try:
                     utcR
                 except NameError:
@@ -294,18 +422,13 @@ class Uv(WriterBase):
                 obs.date = utc - astro.DJD_OFFSET
                 if dataSet.source == 'z':
                     ### Zenith pointings
-                    equ = astro.equ_posn( obs.sidereal_time()*180/numpy.pi, obs.lat*180/numpy.pi )
-                    
-                    ### format 'source' name based on local sidereal time
-                    raHms = astro.deg_to_hms(equ.ra)
-                    (tsecs, secs) = math.modf(raHms.seconds)
-                    name = "ZA%02d%02d%02d%01d" % (raHms.hours, raHms.minutes, int(secs), int(tsecs * 10.0))
+                    equ, name = self._get_zenith_info(dataSet.obsTime, obs)
                 else:
                     ### Real-live sources (ephem.Body instances)
                     name = dataSet.source.name
                     
                 ## Update the source ID
-                sourceID = self._sourceTable.index(name) + 1
+                sourceID = sourceIDs[name]
                 
                 ## Compute the uvw coordinates of all baselines
                 if dataSet.source == 'z':
@@ -324,63 +447,55 @@ class Uv(WriterBase):
                 uvwCoords = dataSet.get_uvw(HA, dec, obs)
                 
                 ## Populate the metadata
+                nBL = len(dataSet.baselines)
+                
                 ### Add in the new baselines
                 try:
-                    blineList.extend( baselineMapped )
+                    blineData[row:row+nBL] = baselineMapped
                 except NameError:
-                    baselineMapped = []
-                    for o in order:
-                        antenna1, antenna2 = dataSet.baselines[o]
-                        if mapper is None:
-                            stand1, stand2 = antenna1.stand.id, antenna2.stand.id
-                        else:
-                            stand1, stand2 = mapper[antenna1.stand.id], mapper[antenna2.stand.id]
-                        baselineMapped.append( merge_baseline(stand1, stand2) ) 
-                    blineList.extend( baselineMapped )
+                    baselineMapped = _merge_baselines(stand1[order], stand2[order])
+                    blineData[row:row+nBL] = baselineMapped
                     
                 ### Add in the new u, v, and w coordinates
-                uList.extend( uvwCoords[order,0] )
-                vList.extend( uvwCoords[order,1] )
-                wList.extend( uvwCoords[order,2] )
+                uData[row:row+nBL] = uvwCoords[order,0]
+                vData[row:row+nBL] = uvwCoords[order,1]
+                wData[row:row+nBL] = uvwCoords[order,2]
                 
                 ### Add in the new date/time
-                dateList.extend( [utc0-utcR,]*len(dataSet.baselines) )
-                timeList.extend( [utc-utc0,]*len(dataSet.baselines) )
-                intTimeList.extend( [dataSet.intTime,]*len(dataSet.baselines) )
+                dateData[row:row+nBL] = utc0-utcR
+                timeData[row:row+nBL] = utc-utc0
+                intTimeData[row:row+nBL] = dataSet.intTime
                 
-                ### Add in the new new source ID and name
-                sourceList.extend( [sourceID,]*len(dataSet.baselines) )
-                nameList.extend( [name,]*len(dataSet.baselines) )
+                ### Add in the new new source ID
+                sourceData[row:row+nBL] = sourceID
                 
                 ### Zero out the visibility data
-                try:
-                    if matrix.shape[0] != len(order):
-                        raise NameError
-                    matrix *= 0.0
-                except NameError:
-                    matrix = numpy.zeros((len(order), 1, 1, self.nChan, self.nStokes, 2), dtype=numpy.float32)
-                    
+                matrix = visData[row:row+nBL]
+                matrix.fill(0.0)
+                
+                row += nBL
+                
             # Save the visibility data in the right order
-            matrix[:,0,0,:,self.stokes.index(dataSet.pol),0] = dataSet.visibilities[order,:].real
-            matrix[:,0,0,:,self.stokes.index(dataSet.pol),1] = dataSet.visibilities[order,:].imag
+            vis = dataSet.visibilities[order,:]
+            polIndex = self.stokes.index(dataSet.pol)
+            matrix[:,0,0,:,polIndex,0] = vis.real
+            matrix[:,0,0,:,polIndex,1] = vis.imag
             
-            # Deal with saving the data once all of the polarizations have been added to 'matrix'
-            if dataSet.pol == self.stokes[-1]:
-                mList.append( matrix*1.0 )
-                
-        nBaseline = len(blineList)
-        
         # Create the UV Data table and update its header
-        uv = astrofits.GroupData(numpy.concatenate(mList), parnames=['UU', 'VV', 'WW', 'DATE', 'DATE', 'BASELINE', 'SOURCE', 'INTTIM'], 
-                                 pardata=[numpy.array(uList, dtype=numpy.float32), numpy.array(vList, dtype=numpy.float32), 
-                                          numpy.array(wList, dtype=numpy.float32), numpy.array(dateList), numpy.array(timeList), 
-                                          numpy.array(blineList), numpy.array(sourceList), 
-                                          numpy.array(intTimeList)], 
+        uv = astrofits.GroupData(visData, parnames=['UU', 'VV', 'WW', 'DATE', 'DATE', 'BASELINE', 'SOURCE', 'INTTIM'], 
+                                 pardata=[uData, vData, wData, dateData, timeData, 
+                                          blineData, sourceData, intTimeData], 
                                  parbscales=[1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0], 
                                  parbzeros=[0.0, 0.0, 0.0, utcR, 0.0, 0.0, 0.0, 0.0], 
                                  bitpix=-32)
         primary = astrofits.GroupsHDU(uv)
         
+        # The visibility data have been copied into the HDU so the staging
+        # area is no longer needed
+        del visData, matrix
+        if visFile is not None:
+            visFile.close()
+        
         primary.header['EXTEND'] = (True, 'indicates UVFITS file')
         primary.header['GROUPS'] = (True, 'indicates UVFITS file')
         primary.header['OBJECT'] = 'BINARYTB'
@@ -452,30 +567,49 @@ class Uv(WriterBase):
             pass
             
         self.FITS.append(primary)
-        self.FITS.flush()
         
     def _write_aipsan_hdu(self, dummy=False):
         """
         Define the 'AIPS AN' table .
         """
         
-        i = 0
-        names = []
+        # The temporary table only needs to be built once per write()
+        if dummy and getattr(self, 'an', None) is not None:
+            return
+            
+        # Gather the per-antenna values in a single pass
+        names = numpy.empty(self.nAnt, dtype='U8')
         xyz = numpy.zeros((self.nAnt,3), dtype=numpy.float64)
-        for ant in self.array[0]['ants']:
-            xyz[i,:] = numpy.array([ant.x, ant.y, ant.z])
-            names.append(ant.get_name())
-            i = i + 1
+        nosta = numpy.zeros(self.nAnt, dtype=numpy.int32)
+        noact = numpy.zeros(self.nAnt, dtype=numpy.int32)
+        poltya = numpy.empty(self.nAnt, dtype='U1')
+        polaa = numpy.zeros(self.nAnt, dtype=numpy.float32)
+        polcala = numpy.zeros((self.nAnt,2), dtype=numpy.float32)
+        poltyb = numpy.empty(self.nAnt, dtype='U1')
+        polab = numpy.zeros(self.nAnt, dtype=numpy.float32)
+        polcalb = numpy.zeros((self.nAnt,2), dtype=numpy.float32)
+        mapper = self.array[0]['mapper']
+        for i,ant in enumerate(self.array[0]['ants']):
+            names[i] = ant.get_name()
+            xyz[i,:] = (ant.x, ant.y, ant.z)
+            nosta[i] = mapper[ant.id]
+            noact[i] = ant.id
+            poltya[i] = ant.polA['Type']
+            polaa[i] = ant.polA['Angle']
+            polcala[i,:] = ant.polA['Cal']
+            poltyb[i] = ant.polB['Type']
+            polab[i] = ant.polB['Angle']
+            polcalb[i,:] = ant.polB['Cal']
             
         # Antenna name
         c1 = astrofits.Column(name='ANNAME', format='A8', 
-                        array=numpy.array([ant.get_name() for ant in self.array[0]['ants']]))
+                        array=names)
         # Station coordinates in meters
         c2 = astrofits.Column(name='STABXYZ', unit='METERS', format='3D', 
                         array=xyz)
         # Station number
         c3 = astrofits.Column(name='NOSTA', format='1J', 
-                        array=numpy.array([self.array[0]['mapper'][ant.id] for ant in self.array[0]['ants']]))
+                        array=nosta)
         # Mount type (0 == alt-azimuth)
         c4 = astrofits.Column(name='MNTSTA', format='1J', 
                         array=numpy.zeros((self.nAnt,), dtype=numpy.int32))
@@ -490,22 +624,22 @@ class Uv(WriterBase):
                        array=numpy.ones(self.nAnt, dtype=numpy.float32)*360.0)
         # Feed A polarization label
         c8 = astrofits.Column(name='POLTYA', format='A1', 
-                        array=numpy.array([ant.polA['Type'] for ant in self.array[0]['ants']]))
+                        array=poltya)
         # Feed A orientation in degrees
         c9 = astrofits.Column(name='POLAA', format='1E', unit='DEGREES', 
-                        array=numpy.array([ant.polA['Angle'] for ant in self.array[0]['ants']], dtype=numpy.float32))
+                        array=polaa)
         # Feed A polarization parameters
         c10 = astrofits.Column(name='POLCALA', format='2E', 
-                        array=numpy.array([ant.polA['Cal'] for ant in self.array[0]['ants']], dtype=numpy.float32))
+                        array=polcala)
         # Feed B polarization label
         c11 = astrofits.Column(name='POLTYB', format='A1', 
-                        array=numpy.array([ant.polB['Type'] for ant in self.array[0]['ants']]))
+                        array=poltyb)
         # Feed B orientation in degrees
         c12 = astrofits.Column(name='POLAB', format='1E', unit='DEGREES', 
-                        array=numpy.array([ant.polB['Angle'] for ant in self.array[0]['ants']], dtype=numpy.float32))
+                        array=polab)
         # Feed B polarization parameters
         c13 = astrofits.Column(name='POLCALB', format='2E', 
-                        array=numpy.array([ant.polB['Cal'] for ant in self.array[0]['ants']], dtype=numpy.float32))
+                        array=polcalb)
                         
         # Define the collection of columns
         colDefs = astrofits.ColDefs([c1, c2, c3, c4, c5, c6, c7, c8, c9, c10, c11, c12, c13])
@@ -536,23 +670,12 @@ class Uv(WriterBase):
         
         refDate = self.astro_ref_time
         refMJD = refDate.to_jd() - astro.MJD_OFFSET
-        eop = iers.IERS_Auto.open()
-        refAT = AstroTime(refMJD, format='mjd', scale='utc')
-        try:
-            # Temporary fix for maia.usno.navy.mil being down
-            ut1_utc = eop.ut1_utc(refAT)
-            pm_xy = eop.pm_xy(refAT)
-        except iers.IERSRangeError:
-            eop.close()
-            with iers.Conf().set_temp('iers_auto_url', 'ftp://cddis.gsfc.nasa.gov/pub/products/iers/finals2000A.all'):
-                eop = iers.IERS_Auto.open()
-                ut1_utc = eop.ut1_utc(refAT)
-                pm_xy = eop.pm_xy(refAT)
-                    
-        an.header['UT1UTC'] = (ut1_utc.to('s').value, 'difference UT1 - UTC for reference date')
+        ut1_utc, pm_x, pm_y = _get_eop(refMJD)
+        
+        an.header['UT1UTC'] = (ut1_utc, 'difference UT1 - UTC for reference date')
         an.header['IATUTC'] = (astro.leap_secs(utc0), 'TAI - UTC for reference date')
-        an.header['POLARX'] = pm_xy[0].to('arcsec').value
-        an.header['POLARY'] = pm_xy[1].to('arcsec').value
+        an.header['POLARX'] = pm_x
+        an.header['POLARY'] = pm_y
         
         an.header['ARRAYX'] = (self.array[0]['center'][0], 'array ECI X coordinate (m)')
         an.header['ARRAYY'] = (self.array[0]['center'][1], 'array ECI Y coordinate (m)')
@@ -563,15 +686,14 @@ class Uv(WriterBase):
         if dummy:
             self.an = an
             if self.array[0]['enableMapper']:
-                self._write_mapper_hdu(dummy=True)
+                self._write_mapper_hdu(names, nosta, noact, dummy=True)
                 
         else:
             an.name = 'AIPS AN'
             self.FITS.append(an)
-            self.FITS.flush()
             
             if self.array[0]['enableMapper']:
-                self._write_mapper_hdu()
+                self._write_mapper_hdu(names, nosta, noact)
                 
     def _write_aipsfq_hdu(self):
         """
@@ -602,19 +724,22 @@ class Uv(WriterBase):
         self._add_common_keywords(fq.header, 'AIPS FQ', 1)
         
         self.FITS.append(fq)
-        self.FITS.flush()
         
     def _write_aipsbp_hdu(self):
         """
         Define the 'AIPS BP' table.
         """
         
+        # Bandpass values that are the same for all antennas
+        ones2D = numpy.broadcast_to(numpy.ones(self.nChan, dtype=numpy.float32), (self.nAnt,self.nChan))
+        zeros2D = numpy.broadcast_to(numpy.zeros(self.nChan, dtype=numpy.float32), (self.nAnt,self.nChan))
+        
         # Central time of period covered by record in days
         c1 = astrofits.Column(name='TIME', unit='DAYS', format='1D', 
                         array=numpy.zeros((self.nAnt,), dtype=numpy.float64))
         # Duration of period covered by record in days
         c2 = astrofits.Column(name='INTERVAL', unit='DAYS', format='1E',
-                        array=(2*numpy.ones((self.nAnt,), dtype=numpy.float32)))
+                        array=numpy.full(self.nAnt, 2.0, dtype=numpy.float32))
         # Source ID
         c3 = astrofits.Column(name='SOURCE ID', format='1J', 
                         array=numpy.zeros((self.nAnt,), dtype=numpy.int32))
@@ -623,40 +748,40 @@ class Uv(WriterBase):
                         array=numpy.ones((self.nAnt,), dtype=numpy.int32))
         # Frequency setup number
         c5 = astrofits.Column(name='FREQ ID', format='1J',
-                        array=(numpy.zeros((self.nAnt,), dtype=numpy.int32) + self.freq[0].id))
+                        array=numpy.full(self.nAnt, self.freq[0].id, dtype=numpy.int32))
         # Antenna number
         c6 = astrofits.Column(name='ANTENNA', format='1J', 
                         array=self.FITS['AIPS AN'].data.field('NOSTA'))
         # Bandwidth in Hz
         c7 = astrofits.Column(name='BANDWIDTH', unit='HZ', format='1E',
-                        array=(numpy.zeros((self.nAnt,), dtype=numpy.float32)+self.freq[0].totalBW))
+                        array=numpy.full(self.nAnt, self.freq[0].totalBW, dtype=numpy.float32))
         # Band frequency in Hz
         c8 = astrofits.Column(name='CHN_SHIFT', format='1D',
-                        array=(numpy.zeros((self.nAnt,), dtype=numpy.float64)+self.freq[0].bandFreq))
+                        array=numpy.full(self.nAnt, self.freq[0].bandFreq, dtype=numpy.float64))
         # Reference antenna number (pol. 1)
         c9 = astrofits.Column(name='REFANT 1', format='1J',
                         array=numpy.ones((self.nAnt,), dtype=numpy.int32))
         # Solution weight (pol. 1)
         c10 = astrofits.Column(name='WEIGHT 1', format='%dE' % self.nChan,
-                        array=numpy.ones((self.nAnt,self.nChan), dtype=numpy.float32))
+                        array=ones2D)
         # Real part of the bandpass (pol. 1)
         c11 = astrofits.Column(name='REAL 1', format='%dE' % self.nChan,
-                        array=numpy.ones((self.nAnt,self.nChan), dtype=numpy.float32))
+                        array=ones2D)
         # Imaginary part of the bandpass (pol. 1)
         c12 = astrofits.Column(name='IMAG 1', format='%dE' % self.nChan,
-                        array=numpy.zeros((self.nAnt,self.nChan), dtype=numpy.float32))
+                        array=zeros2D)
         # Reference antenna number (pol. 2)
         c13 = astrofits.Column(name='REFANT 2', format='1J',
                         array=numpy.ones((self.nAnt,), dtype=numpy.int32))
         # Solution weight (pol. 2)
         c14 = astrofits.Column(name='WEIGHT 2', format='%dE' % self.nChan,
-                        array=numpy.ones((self.nAnt,self.nChan), dtype=numpy.float32))
+                        array=ones2D)
         # Real part of the bandpass (pol. 2)
         c15 = astrofits.Column(name='REAL 2', format='%dE' % self.nChan,
-                        array=numpy.ones((self.nAnt,self.nChan), dtype=numpy.float32))
+                        array=ones2D)
         # Imaginary part of the bandpass (pol. 2)
         c16 = astrofits.Column(name='IMAG 2', format='%dE' % self.nChan,
-                        array=numpy.zeros((self.nAnt,self.nChan), dtype=numpy.float32))
+                        array=zeros2D)
                         
         colDefs = astrofits.ColDefs([c1, c2, c3, c4, c5, c6, c7, c8, c9, c10, 
                             c11, c12, c13, c14, c15, c16])
@@ -673,13 +798,16 @@ class Uv(WriterBase):
         bp.header['BP_TYPE'] = ' '
         
         self.FITS.append(bp)
-        self.FITS.flush()
         
     def _write_aipssu_hdu(self, dummy=False):
         """
         Define the 'AIPS SU' table.
         """
         
+        # The temporary table only needs to be built once per write()
+        if dummy and getattr(self, '_sourceTable', None) is not None:
+            return
+            
         self._write_aipsan_hdu(dummy=True)
         (arrPos, ag) = self.read_array_geometry(dummy=True)
         ids = ag.keys()
@@ -691,6 +819,7 @@ class Uv(WriterBase):
         obs.pressure = 0
         
         nameList = []
+        nameSet = set()
         raList = []
         decList = []
         raPoList = []
@@ -698,12 +827,7 @@ class Uv(WriterBase):
         sourceID = 0
         for dataSet in self.data:
             if dataSet.pol == self.stokes[0]:
-                utc = astro.taimjd_to_utcjd(dataSet.obsTime)
-                date = astro.get_date(utc)
-                date.hours = 0
-                date.minutes = 0
-                date.seconds = 0
-                utc0 = date.to_jd()
+                utc, utc0 = self._get_time_info(dataSet.obsTime)
                 
                 obs.date = utc - astro.DJD_OFFSET
                 
@@ -712,18 +836,12 @@ class Uv(WriterBase):
                 except AttributeError:
                     currSourceName = dataSet.source
                 
-                if currSourceName not in nameList:
+                if currSourceName not in nameSet:
                     sourceID += 1
                     
                     if dataSet.source == 'z':
                         ## Zenith pointings
-                        equ = astro.equ_posn( obs.sidereal_time()*180/numpy.pi, obs.lat*180/numpy.pi )
-                        
-                        # format 'source' name based on local sidereal time
-                        raHms = astro.deg_to_hms(equ.ra)
-                        (tsecs, secs) = math.modf(raHms.seconds)
-                        
-                        name = "ZA%02d%02d%02d%01d" % (raHms.hours, raHms.minutes, int(secs), int(tsecs * 10.0))
+                        equ, name = self._get_zenith_info(dataSet.obsTime, obs)
                         equPo = astro.get_equ_prec2(equ, utc, astro.J2000_UTC_JD)
                         
                     else:
@@ -742,6 +860,7 @@ class Uv(WriterBase):
                     
                     # name
                     nameList.append(name)
+                    nameSet.add(name)
                     
         nSource = len(nameList)
         
@@ -819,21 +938,23 @@ class Uv(WriterBase):
         
         if not dummy:
             self.FITS.append(su)
-            self.FITS.flush()
             
-    def _write_mapper_hdu(self, dummy=False):
+    def _write_mapper_hdu(self, names, nosta, noact, dummy=False):
         """
         Write a fits table that contains information about mapping stations 
         numbers to actual antenna numbers.  This information can be backed out of
         the names, but this makes the extraction more programmatic.
+        
+        The antenna names, mapped station numbers, and actual stand numbers are
+        passed in from _write_aipsan_hdu so that they are only gathered once.
         """
         
         c1 = astrofits.Column(name='ANNAME', format='A8', 
-                        array=numpy.array([ant.get_name() for ant in self.array[0]['ants']]))
+                        array=names)
         c2 = astrofits.Column(name='NOSTA', format='1J', 
-                        array=numpy.array([self.array[0]['mapper'][ant.id] for ant in self.array[0]['ants']]))
+                        array=nosta)
         c3 = astrofits.Column(name='NOACT', format='1J', 
-                        array=numpy.array([ant.id for ant in self.array[0]['ants']]))
+                        array=noact)
                         
         colDefs = astrofits.ColDefs([c1, c2, c3])
         
@@ -846,7 +967,6 @@ class Uv(WriterBase):
         else:
             nsm.name = 'NOSTA_MAPPER'
             self.FITS.append(nsm)
-            self.FITS.flush()
             
     def read_array_geometry(self, dummy=False):
         """
@@ -65,6 +65,26 @@ class fake_TBN_tests(unittest.TestCase):
         # Test the validity of the SimFrame
         self.assertTrue(fakeFrame.is_valid())
         
+    def test_sim_frame_numpy_ints(self):
+        """Test creating a raw TBN frame from numpy integer header values."""
+        
+        # Read in a TBN frame from the test file
+        fh = open(tbnFile, 'rb')
+        origFrame = tbnReader.read_frame(fh)
+        fh.close()
+        
+        fakeFrame = tbnWriter.SimFrame()
+        fakeFrame.load_frame(origFrame)
+        obs_time = int(fakeFrame.obs_time)
+        rawFrame = fakeFrame.create_raw_frame()
+        
+        # Numpy integer time tags should pack the same as a Python integer
+        for itype in (numpy.int64, numpy.uint64):
+            fakeFrame.obs_time = itype(obs_time)
+            fakeFrame.frame_count = itype(fakeFrame.frame_count)
+            fakeFrame.gain = itype(fakeFrame.gain)
+            self.assertEqual(fakeFrame.create_raw_frame().tobytes(), rawFrame.tobytes())
+        
     def test_write_frame(self):
         """Test that the TBN data writer works."""
         
@@ -16,6 +16,13 @@ from lsl.correlator import filterbank
 from lsl.correlator.fx import null_window
 import lsl.testing
 
+run_scipy_fft_tests = False
+try:
+    import scipy.fft
+    run_scipy_fft_tests = True
+except ImportError:
+    pass
+
 
 __version__  = "0.3"
 __author__    = "Jayce Dowell"
@@ -50,6 +57,38 @@ class filterbank_tests(unittest.TestCase):
                 with self.subTest(ntap=ntap, dtype=dtype):
                     self.run_filterbank_test(dtype, ntap=ntap)
                     
+    def test_filterbank_values(self):
+        """Test the filterbank output against a direct calculation."""
+        
+        for nchan in (255, 256):
+            for ntap in (1, 2, 4, 8, 16):
+                for dtype in (numpy.float64, numpy.complex128):
+                    with self.subTest(nchan=nchan, ntap=ntap, dtype=dtype):
+                        data = numpy.random.rand(nchan*ntap*4)
+                        if dtype == numpy.complex128:
+                            data = data + 1j*numpy.random.rand(nchan*ntap*4)
+                            
+                        t = numpy.arange(nchan*ntap)
+                        filtered = data[:nchan*ntap]*numpy.sinc((t - nchan*ntap/2.0 + 0.5)/nchan)
+                        ref = numpy.zeros(nchan, dtype=numpy.complex128)
+                        for i in range(ntap):
+                            ref += numpy.fft.fft(filtered[i*nchan:(i+1)*nchan])
+                            
+                        out = filterbank.fft(data, nchan, P=ntap)
+                        self.assertEqual(out.shape, ref.shape)
+                        numpy.testing.assert_allclose(out, ref, atol=1e-8)
+                        
+    @unittest.skipUnless(run_scipy_fft_tests, "requires the 'scipy.fft' module")
+    def test_filterbank_precision(self):
+        """Test that the filterbank keeps single precision data in single precision."""
+        
+        for dtype,otype in ((numpy.float32, numpy.complex64), (numpy.complex64, numpy.complex64), 
+                            (numpy.float64, numpy.complex128), (numpy.complex128, numpy.complex128)):
+            with self.subTest(dtype=dtype):
+                data = numpy.random.rand(256*4).astype(dtype)
+                out = filterbank.fft4(data, 256)
+                self.assertEqual(out.dtype, otype)
+                
     def test_filterbank_window(self):
         """Test that window functions can be passed to the filterbank."""
         
@@ -925,6 +925,15 @@ class FXStokes_tests(unittest.TestCase):
         freq, cps = fx.FXStokes(fakeData, antennas[:self.nAnt], sample_rate=1e5, central_freq=38e6, 
                             gain_correct=True)
                             
+        # Make sure that every baseline has been corrected
+        blList, freq, cps = fx.FXStokes(fakeData, antennas[:self.nAnt], sample_rate=1e5, central_freq=38e6, 
+                                    gain_correct=True, return_baselines=True)
+        blList, freq, cps2 = fx.FXStokes(fakeData, antennas[:self.nAnt], sample_rate=1e5, central_freq=38e6, 
+                                     return_baselines=True)
+        for bl,(ant1,ant2) in enumerate(blList):
+            cableGain = numpy.sqrt(ant1.cable.gain(freq)*ant2.cable.gain(freq))
+            lsl.testing.assert_allclose(cps[:,bl,:], cps2[:,bl,:]/cableGain)
+            
     def test_correlator_baselines(self):
         """Test that the return_baselines keyword works."""
         
@@ -648,6 +648,46 @@ class imaging_tests(unittest.TestCase):
                 
                 idi.close()
                 
+    def test_selfcal_recovery(self):
+        """Test recovering known gains, delays, and phase offsets with self calibration."""
+        
+        # Open the file
+        idi = utils.CorrelatedData(idiFile)
+        aa = idi.get_antennaarray()
+        ds = idi.get_data_set(1)
+        idi.close()
+        
+        # Build a random model sky...
+        numpy.random.seed(42)
+        nAnt = len(aa.ants)
+        sim = ds.copy(include_pols=True)
+        sim.XX.data = numpy.random.uniform(0.5, 2.0, sim.XX.data.shape) \
+                      * numpy.exp(1j*numpy.random.uniform(-numpy.pi, numpy.pi, sim.XX.data.shape))
+        
+        # ... and corrupt it with a known set of antenna-based errors
+        amps = numpy.random.uniform(0.8, 1.2, nAnt)
+        delays = numpy.random.uniform(-2.0, 2.0, nAnt)
+        delays[0] = 0.0
+        phase_offsets = numpy.random.uniform(-1.0, 1.0, nAnt)
+        phase_offsets[0] = 0.0
+        gains = numpy.exp(-2j*numpy.pi*(ds.freq/1e9)*delays[:,None] - 1j*phase_offsets[:,None]) / amps[:,None]
+        bls = numpy.array(ds.baselines)
+        obs = ds.copy(include_pols=True)
+        obs.XX.data = sim.XX.data * gains[bls[:,1],:].conj() * gains[bls[:,0],:]
+        
+        chan = numpy.arange(10, ds.freq.size-10)
+        for zeroed in (False, True):
+            with self.subTest(zeroed=zeroed):
+                obs2 = obs.copy(include_pols=True)
+                if zeroed:
+                    obs2.XX.data[3,20] = 0.0
+                
+                junk, bestGains, bestDelays, bestPhaseOffsets = selfcal.delay_and_phase(aa, obs2, sim, chan, 'XX', verbose=False, amplitude=True)
+                for i in range(nAnt):
+                    self.assertAlmostEqual(bestGains[i], amps[i], 4)
+                    self.assertAlmostEqual(bestDelays[i], delays[i], 4)
+                    self.assertAlmostEqual(bestPhaseOffsets[i], phase_offsets[i], 4)
+                    
     def test_background(self):
         """Test the background estimation"""
         
@@ -36,6 +36,22 @@ class kurtosis_tests(unittest.TestCase):
         self.assertAlmostEqual(lower, 0.76648, 5)
         self.assertAlmostEqual(upper, 1.28313, 5)
         
+    def test_limits_array(self):
+        """Test the limits returned by get_limits() for arrays of M and N"""
+        
+        M = numpy.array([10, 30, 100, 300, 1000])
+        N = numpy.array([1, 10])
+        sigma = 3
+        
+        lower, upper = kurtosis.get_limits(sigma, M, N=N[:,None])
+        self.assertEqual(lower.shape, (N.size, M.size))
+        self.assertEqual(upper.shape, (N.size, M.size))
+        for i,n in enumerate(N):
+            for j,m in enumerate(M):
+                l, u = kurtosis.get_limits(sigma, m, N=n)
+                self.assertAlmostEqual(lower[i,j], l, 6)
+                self.assertAlmostEqual(upper[i,j], u, 6)
+                
     def test_kurtosis(self):
         """Test that spectal kurtosis runs"""
         
@@ -60,6 +76,27 @@ class kurtosis_tests(unittest.TestCase):
             self.assertAlmostEqual(s0, s1, 6)
             self.assertTrue(s0 > lower)
             self.assertTrue(s1 < upper)
+            
+        sk2 = kurtosis.spectral_fft(data.T, axis=1)
+        self.assertEqual(sk1.size, sk2.size)
+        for s1,s2 in zip(sk1, sk2):
+            self.assertAlmostEqual(s1, s2, 6)
+            
+    def test_kurtosis_dtype(self):
+        """Test that spectral kurtosis is computed accurately for integer and single precision power"""
+        
+        # Integer powers whose squares fit in an int16 but whose sum of
+        # squares does not
+        data = numpy.random.randint(50, 181, size=(20000,)).astype(numpy.int16)
+        sk0 = kurtosis.spectral_power(data.astype(numpy.float64))
+        sk1 = kurtosis.spectral_power(data)
+        self.assertAlmostEqual(sk0, sk1, 10)
+        
+        # Single precision powers along an axis
+        data = (numpy.random.randn(64, 20000)**2).astype(numpy.float32)
+        sk0 = kurtosis.spectral_power(data.astype(numpy.float64), axis=1)
+        sk1 = kurtosis.spectral_power(data, axis=1)
+        numpy.testing.assert_allclose(sk1, sk0, rtol=1e-6)
 
 
 class kurtosis_test_suite(unittest.TestSuite):
@@ -8,10 +8,11 @@ import sys
 if sys.version_info < (3,):
     range = xrange
     
+import io
 import os
 import unittest
 
-from lsl.common import metabundle
+from lsl.common import metabundle, sdm, stations
 
 
 __version__  = "0.5"
@@ -103,6 +104,27 @@ class metabundle_tests(unittest.TestCase):
         
         sm = metabundle.get_sdm(mdbFile)
         
+        # Antenna status updates
+        ants = sm.update_antennas(stations.lwa1.antennas)
+        self.assertEqual(len(ants), len(stations.lwa1.antennas))
+        for ant,orig in zip(ants, stations.lwa1.antennas):
+            self.assertEqual(ant.status, sm.ant_status[ant.stand.id-1][ant.pol])
+            self.assertFalse(ant is orig)
+            self.assertEqual(ant.id, orig.id)
+            
+    def test_sdm_short(self):
+        """Test the station dynamic MIB utilties on short SDM files."""
+        
+        # Short SDM files are zero padded
+        for filename in (mdbFileGDB, mdbFileGDBOld0):
+            sm = metabundle.get_sdm(filename)
+            self.assertTrue(isinstance(sm, sdm.SDM))
+            self.assertEqual(sm.settings.tbn_gain, 0)
+            self.assertEqual(sm.settings.drx_gain, 0)
+            
+        # Truncated SDM files are not
+        self.assertRaises(ValueError, sdm.parse_sdm, io.BytesIO(b'\x00'*1000))
+        
     def test_metadata(self):
         """Test the observation metadata utility."""
         
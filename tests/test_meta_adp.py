@@ -11,7 +11,7 @@ if sys.version_info < (3,):
 import os
 import unittest
 
-from lsl.common import metabundleADP
+from lsl.common import metabundleADP, stations
 
 
 __version__  = "0.2"
@@ -104,6 +104,14 @@ class metabundle_tests_adp(unittest.TestCase):
         
         sm = metabundleADP.get_sdm(mdbFileADP)
         
+        # Antenna status updates
+        ants = sm.update_antennas(stations.lwasv.antennas)
+        self.assertEqual(len(ants), len(stations.lwasv.antennas))
+        for ant,orig in zip(ants, stations.lwasv.antennas):
+            self.assertEqual(ant.status, sm.ant_status[ant.stand.id-1][ant.pol])
+            self.assertFalse(ant is orig)
+            self.assertEqual(ant.id, orig.id)
+            
     def test_metadata(self):
         """Test the observation metadata utility."""
         
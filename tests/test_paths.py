@@ -43,6 +43,16 @@ class paths_tests(unittest.TestCase):
 
         timeFile = os.path.join(DATA_PATH, 'astro', 'Leap_Second.dat')
         self.assertTrue(os.path.exists(timeFile))
+        
+    def test_data_file(self):
+        """Test the paths.data_file function."""
+        
+        ssmif = paths.data_file('lwa1-ssmif.txt')
+        self.assertEqual(ssmif, os.path.join(paths.DATA, 'lwa1-ssmif.txt'))
+        
+        timeFile = paths.data_file('astro/Leap_Second.dat')
+        self.assertEqual(timeFile, os.path.join(paths.DATA, 'astro', 'Leap_Second.dat'))
+        self.assertTrue(os.path.exists(timeFile))
 
 
 class paths_test_suite(unittest.TestSuite):
@@ -275,6 +275,15 @@ class robust_tests(unittest.TestCase):
         self.assertAlmostEqual(robust.mean(b, cut=2.0, axis=1)[0], -0.217644, 6)
         self.assertAlmostEqual(robust.mean(b, cut=2.0, axis=1)[1], -0.234631, 6)
         
+        b = self.a[:(self.a.size//4)*4].reshape(4,-1)
+        for cut in (2.0, 3.0):
+            m = robust.mean(b, cut=cut, axis=1)
+            for i in range(b.shape[0]):
+                self.assertAlmostEqual(m[i], robust.mean(b[i,:], cut=cut), 12)
+            m = robust.mean(b.T, cut=cut, axis=0)
+            for i in range(b.shape[0]):
+                self.assertAlmostEqual(m[i], robust.mean(b[i,:], cut=cut), 12)
+        
         b = numpy.ma.array(self.a, mask=numpy.zeros(self.a.size, dtype=bool))
         b.mask[:b.size//2] = False
         b.mask[b.size//2:] = True
@@ -9,6 +9,7 @@ if sys.version_info < (3,):
     range = xrange
     
 import os
+import copy
 import time
 import unittest
 import tempfile
@@ -304,6 +305,103 @@ class uvfits_tests(unittest.TestCase):
             
         hdulist.close()
         
+    def test_uvdata_staged(self):
+        """Test the primary data table when the visibilities are staged on disk."""
+        
+        testTime = time.time() - 2*86400.0
+        testFile = os.path.join(self.testPath, 'uv-test-UVS.fits')
+        refFile = os.path.join(self.testPath, 'uv-test-UVR.fits')
+        
+        # Get some data
+        data = self._init_data()
+        
+        # Write the file twice, once staging the visibilities in memory and
+        # once staging them in a temporary file
+        for filename,max_size in ((refFile, None), (testFile, 0)):
+            fits = uvfits.Uv(filename, ref_time=testTime)
+            if max_size is not None:
+                fits._MAX_VIS_IN_MEMORY = max_size
+            fits.set_stokes(['xx'])
+            fits.set_frequency(data['freq'])
+            fits.set_geometry(data['site'], data['antennas'])
+            fits.add_data_set(unix_to_taimjd(testTime), 6.0, data['bl'], data['vis'])
+            fits.write()
+            fits.close()
+        
+        # Make sure that the temporary file has been cleaned up
+        self.assertEqual(sorted(os.listdir(self.testPath)), ['uv-test-UVR.fits', 'uv-test-UVS.fits'])
+        
+        # Open the files and compare
+        hdulist = astrofits.open(testFile)
+        reflist = astrofits.open(refFile)
+        numpy.testing.assert_equal(hdulist[0].data['DATA'], reflist[0].data['DATA'])
+        numpy.testing.assert_equal(hdulist[0].data['BASELINE'], reflist[0].data['BASELINE'])
+        
+        hdulist.close()
+        reflist.close()
+        
+    def test_uvdata_extra_stands(self):
+        """Test the primary data table when the baselines include stands not in the geometry."""
+        
+        testTime = time.time() - 2*86400.0
+        testFile = os.path.join(self.testPath, 'uv-test-UVE.fits')
+        
+        # Get some data
+        data = self._init_data()
+        
+        # Start the file with only half of the antennas in the geometry
+        fits = uvfits.Uv(testFile, ref_time=testTime)
+        fits.set_stokes(['xx'])
+        fits.set_frequency(data['freq'])
+        fits.set_geometry(data['site'], data['antennas'][:10])
+        fits.add_data_set(unix_to_taimjd(testTime), 6.0, data['bl'], data['vis'])
+        fits.write()
+        fits.close()
+        
+        # Open the file and examine - without the mapper the baselines should 
+        # be packed with the real stand numbers
+        hdulist = astrofits.open(testFile)
+        uv = hdulist[0]
+        bls = [uvfits.merge_baseline(ant1.stand.id, ant2.stand.id) for ant1,ant2 in data['bl']]
+        self.assertEqual(sorted([int(bl) for bl in uv.data['BASELINE']]), sorted(bls))
+        
+        hdulist.close()
+        
+    def test_uvdata_extra_stands_mapped(self):
+        """Test that stands not in the geometry are caught when the stand mapper is enabled."""
+        
+        testTime = time.time() - 2*86400.0
+        testFile = os.path.join(self.testPath, 'uv-test-UVM.fits')
+        
+        # Get some data and shift the stand numbers so that the mapper is used
+        data = self._init_data()
+        antennas = copy.deepcopy(data['antennas'])
+        for i,ant in enumerate(antennas):
+            ant.stand.id = 3000 + i
+        blList = uvutils.get_baselines(antennas, include_auto=True, indicies=False)
+        
+        # Start the file with only half of the antennas in the geometry
+        fits = uvfits.Uv(testFile, ref_time=testTime)
+        fits.set_stokes(['xx'])
+        fits.set_frequency(data['freq'])
+        fits.set_geometry(data['site'], antennas[:10])
+        fits.add_data_set(unix_to_taimjd(testTime), 6.0, blList, data['vis'])
+        self.assertRaises(ValueError, fits.write)
+        
+        # Make sure that the failed write() did not leave behind any stale 
+        # tables by fixing the geometry and trying again at a new time
+        del fits.data[:]
+        fits.array = []
+        fits.set_geometry(data['site'], antennas)
+        fits.add_data_set(unix_to_taimjd(testTime+3600.0), 6.0, blList, data['vis'])
+        fits.write()
+        fits.close()
+        
+        hdulist = astrofits.open(testFile)
+        self.assertEqual(len(hdulist['AIPS AN'].data), len(antennas))
+        self.assertEqual(len(hdulist['AIPS SU'].data), 1)
+        hdulist.close()
+        
     def tearDown(self):
         """Remove the test path directory and its contents"""
         
@@ -60,7 +60,20 @@ class uvutils_tests(unittest.TestCase):
         bl = uvutils.get_baselines(standList, include_auto=True, indicies=True)
         bl = numpy.array(bl)
         self.assertTrue(bl.max() < 100)
-        
+
+    def test_baseline_order(self):
+        """Test the ordering of the generated baselines."""
+
+        standList = numpy.array([100, 101, 102, 103])
+
+        bl = uvutils.get_baselines(standList, include_auto=False, indicies=True)
+        self.assertEqual(bl, [(0,1), (0,2), (0,3), (1,2), (1,3), (2,3)])
+        bl = uvutils.get_baselines(standList, include_auto=True, indicies=True)
+        self.assertEqual(bl, [(0,0), (0,1), (0,2), (0,3), (1,1), (1,2), (1,3), (2,2), (2,3), (3,3)])
+
+        bl = uvutils.get_baselines(standList[:2], antennas2=standList[2:], include_auto=True, indicies=False)
+        self.assertEqual(bl, [(100,102), (100,103), (101,103)])
+
     def test_antenna_lookup(self):
         """Test baseline number to antenna lookup function."""
         
@@ -89,7 +102,25 @@ class uvutils_tests(unittest.TestCase):
         
         ind = uvutils.antennas_to_baseline(0, 3, standList, include_auto=False, indicies=True)
         self.assertEqual(ind, 2)
-        
+
+        for include_auto in (False, True):
+            bl = uvutils.get_baselines(standList, include_auto=include_auto, indicies=True)
+            for i in range(-1, 5):
+                for j in range(-1, 5):
+                    try:
+                        ref = bl.index((min(i,j), max(i,j)))
+                    except ValueError:
+                        ref = -1
+                    ind = uvutils.antennas_to_baseline(i, j, standList, include_auto=include_auto, indicies=True)
+                    self.assertEqual(ind, ref)
+                    ind = uvutils.antennas_to_baseline(i, j, standList, baseline_list=bl)
+                    self.assertEqual(ind, ref)
+
+        ind = uvutils.antennas_to_baseline(101, 101, standList, include_auto=False, indicies=False)
+        self.assertEqual(ind, -1)
+        ind = uvutils.antennas_to_baseline(101, 101, standList, include_auto=True, indicies=False)
+        self.assertEqual(ind, 4)
+
     def run_compute_uvw_test(self, antennas, freq):
         out = uvutils.compute_uvw(antennas, freq=freq)
         
@@ -154,6 +185,9 @@ class uvutils_tests(unittest.TestCase):
         # Make sure we have the right dimensions
         self.assertEqual(out.shape, (435,2,512))
         
+        # Make sure the tracks are finite all the way to their ends
+        self.assertTrue(numpy.isfinite(out).all())
+        
         
 class uvutils_test_suite(unittest.TestSuite):
     """A unittest.TestSuite class which contains all of the lsl.reader units 